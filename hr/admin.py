@@ -1,6 +1,6 @@
 # Register your models here.
 from django.contrib import admin
-from .models import Department, Employee, Attendance, LeaveRequest, OvertimeRecord, Deduction, PayrollPeriod, Payslip
+from .models import Department, Employee, Attendance, LeaveRequest, OvertimeRecord, Deduction, PayrollPeriod, Payslip, PayrollDirtyEmployee, AttendanceSummary, PayrollJob, PayrollRollup, PunchEvent, PunchCompaction
 
 admin.site.register(Department)
 admin.site.register(Employee)
@@ -9,4 +9,10 @@ admin.site.register(LeaveRequest)
 admin.site.register(OvertimeRecord)
 admin.site.register(Deduction)
 admin.site.register(PayrollPeriod)
-admin.site.register(Payslip)
\ No newline at end of file
+admin.site.register(Payslip)
+admin.site.register(PayrollDirtyEmployee)
+admin.site.register(AttendanceSummary)
+admin.site.register(PayrollJob)
+admin.site.register(PayrollRollup)
+admin.site.register(PunchEvent)
+admin.site.register(PunchCompaction)
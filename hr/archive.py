@@ -0,0 +1,216 @@
+# Project/hr/archive.py
+# Immutable, compressed archives of finalized payroll periods.
+#
+# payroll_YYYY_MM.jsonl.gz holds one JSON array per payslip (columns listed in the index),
+# written as independent gzip members of ARCHIVE_BLOCK_ROWS rows each, so a single block can
+# be read by seeking to its offset. payroll_YYYY_MM.index.json records the file's sha256,
+# the block offsets and which block holds each employee.
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PayrollPeriod, Payslip, breakdown_details
+from .versions import PAYROLL_PERIOD, PAYSLIP, bump_versions
+
+ARCHIVE_DIR = Path(getattr(settings, 'HR_PAYROLL_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'var' / 'payroll_archive'))
+ARCHIVE_BLOCK_ROWS = getattr(settings, 'HR_ARCHIVE_BLOCK_ROWS', 1000)
+# archive a period as soon as run_payroll finalizes it. Off by default: an archived period
+# can never be regenerated, so archiving is otherwise an explicit archive_payroll_period run
+ARCHIVE_ON_FINALIZE = getattr(settings, 'HR_ARCHIVE_ON_FINALIZE', False)
+ARCHIVE_FORMAT = 1
+# (archive column, Payslip lookup); employee_id must stay second, the block writer keys on it
+ARCHIVE_COLUMNS = (
+    ('id', 'id'),
+    ('employee_id', 'employee_id'),
+    ('employee_code', 'employee__employee_code'),
+    ('first_name', 'employee__first_name'),
+    ('last_name', 'employee__last_name'),
+    ('department_id', 'employee__department_id'),
+    ('department_name', 'employee__department__name'),
+    ('gross_pay', 'gross_pay'),
+    ('total_deductions', 'total_deductions'),
+    ('net_pay', 'net_pay'),
+    *((name, name) for name in Payslip.BREAKDOWN_FIELDS),
+    ('created_at', 'created_at'),
+)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_paths(year: int, month: int):
+    stem = ARCHIVE_DIR / f'payroll_{year}_{month:02d}'
+    return stem.with_suffix('.jsonl.gz'), stem.with_suffix('.index.json')
+
+
+def _json_value(value):
+    if isinstance(value, (int, str)) or value is None:
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)  # Decimal
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def _write_blocks(rows, fh):
+    """Gzip ``rows`` to ``fh`` in blocks; returns (blocks, employee -> block, sha256, row count)."""
+    digest = hashlib.sha256()
+    blocks, employees, offset, count = [], {}, 0, 0
+    block = []
+
+    def flush():
+        nonlocal offset
+        data = gzip.compress(''.join(block).encode('utf-8'), mtime=0)
+        fh.write(data)
+        digest.update(data)
+        blocks.append([offset, len(data), len(block)])
+        offset += len(data)
+        block.clear()
+
+    for row in rows:
+        employees[str(row[1])] = len(blocks)
+        block.append(json.dumps([_json_value(v) for v in row], separators=(',', ':')) + '\n')
+        count += 1
+        if len(block) >= ARCHIVE_BLOCK_ROWS:
+            flush()
+    if block:
+        flush()
+    return blocks, employees, digest.hexdigest(), count
+
+
+def archive_period(period: PayrollPeriod, prune=False, force=False):
+    """Write ``period``'s payslips to its archive and mark the period archived.
+
+    The period must be finalized. An archived period is left alone unless ``force``
+    (only possible while its payslip rows still exist). With ``prune`` the live
+    ``Payslip`` rows are deleted once the archive is written and verified.
+    Returns the index dict.
+    """
+    if not period.finalized:
+        raise ArchiveError(f'Payroll period {period.year}-{period.month:02d} is not finalized.')
+    data_path, index_path = archive_paths(period.year, period.month)
+    payslips = Payslip.objects.filter(payroll_period=period)
+    if period.archived_at and not force:
+        index = read_index(period)
+    else:
+        if period.archived_at and not payslips.exists():
+            raise ArchiveError('The payslips of this period were pruned; its archive cannot be rebuilt.')
+        lookups = [lookup for _, lookup in ARCHIVE_COLUMNS]
+        rows = payslips.order_by('employee_id').values_list(*lookups).iterator(chunk_size=ARCHIVE_BLOCK_ROWS)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=data_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            blocks, employees, sha256, count = _write_blocks(rows, fh)
+        os.replace(tmp, data_path)
+        index = {
+            'format': ARCHIVE_FORMAT,
+            'year': period.year,
+            'month': period.month,
+            'columns': [name for name, _ in ARCHIVE_COLUMNS],
+            'rows': count,
+            'sha256': sha256,
+            'blocks': blocks,
+            'employees': employees,
+            'created_at': timezone.now().isoformat(),
+        }
+        _write_atomic(index_path, json.dumps(index).encode('utf-8'))
+        PayrollPeriod.objects.filter(pk=period.pk).update(archived_at=timezone.now(), archive_sha256=sha256)
+        period.refresh_from_db(fields=['archived_at', 'archive_sha256'])
+        bump_versions(PAYROLL_PERIOD)
+    if prune:
+        verify_archive(period)
+        with transaction.atomic():
+            payslips.delete()
+            bump_versions(PAYSLIP)
+    return index
+
+
+def read_index(period: PayrollPeriod):
+    _, index_path = archive_paths(period.year, period.month)
+    try:
+        index = json.loads(index_path.read_text())
+    except (OSError, ValueError) as exc:
+        raise ArchiveError(f'Archive index for {period.year}-{period.month:02d} is unreadable: {exc}')
+    if index.get('sha256') != period.archive_sha256:
+        raise ArchiveError(f'Archive index for {period.year}-{period.month:02d} does not match the period.')
+    return index
+
+
+def verify_archive(period: PayrollPeriod):
+    """Re-hash the archive file against the checksum recorded on the period."""
+    data_path, _ = archive_paths(period.year, period.month)
+    digest = hashlib.sha256()
+    try:
+        with open(data_path, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b''):
+                digest.update(chunk)
+    except OSError as exc:
+        raise ArchiveError(f'Archive for {period.year}-{period.month:02d} is unreadable: {exc}')
+    if digest.hexdigest() != period.archive_sha256:
+        raise ArchiveError(f'Archive for {period.year}-{period.month:02d} failed its checksum.')
+    return True
+
+
+def iter_archived_payslips(period: PayrollPeriod):
+    """Yield every archived payslip of ``period`` as a dict keyed by the index's columns."""
+    index = read_index(period)
+    columns = index['columns']
+    data_path, _ = archive_paths(period.year, period.month)
+    # concatenated gzip members read back as one stream
+    with gzip.open(data_path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            yield dict(zip(columns, json.loads(line)))
+
+
+def archived_payslip(period: PayrollPeriod, employee_id: int):
+    """One employee's archived payslip as a dict, or None; decompresses a single block."""
+    index = read_index(period)
+    block_no = index['employees'].get(str(employee_id))
+    if block_no is None:
+        return None
+    offset, length, _ = index['blocks'][block_no]
+    data_path, _ = archive_paths(period.year, period.month)
+    with open(data_path, 'rb') as fh:
+        fh.seek(offset)
+        block = gzip.decompress(fh.read(length)).decode('utf-8')
+    for line in block.splitlines():
+        row = json.loads(line)
+        if row[1] == employee_id:
+            return dict(zip(index['columns'], row))
+    return None
+
+
+def archived_payslip_data(period: PayrollPeriod, row):
+    """An archived row in the shape of ``PayslipListSerializer`` with ``details`` expanded."""
+    return {
+        'id': row['id'],
+        'payroll_period': period.pk,
+        'year': period.year,
+        'month': period.month,
+        'employee': row['employee_id'],
+        'employee_code': row['employee_code'],
+        'employee_name': f"{row['first_name']} {row['last_name']}",
+        'department_id': row['department_id'],
+        'department_name': row['department_name'],
+        'gross_pay': row['gross_pay'],
+        'total_deductions': row['total_deductions'],
+        'net_pay': row['net_pay'],
+        'created_at': row['created_at'],
+        'details': breakdown_details(row[name] for name in Payslip.BREAKDOWN_FIELDS),
+        'archived': True,
+    }
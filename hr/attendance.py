@@ -0,0 +1,86 @@
+# Project/hr/attendance.py
+# Monthly AttendanceSummary maintenance.
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connections
+
+from .models import Attendance, AttendanceSummary
+from .payroll import month_bounds
+
+SUMMARY_UPDATE_FIELDS = ['present_days', 'half_days', 'holidays', 'recorded_days', 'worked_hours', 'updated_at']
+
+
+def worked_hours(check_in, check_out):
+    if check_in is None or check_out is None:
+        return Decimal('0')
+    start = datetime.datetime.combine(datetime.date.min, check_in)
+    end = datetime.datetime.combine(datetime.date.min, check_out)
+    if end < start:
+        end += datetime.timedelta(days=1)  # shift ran past midnight
+    return Decimal((end - start).total_seconds()) / Decimal(3600)
+
+
+def summarize(employee_id, year, month, rows):
+    """Build an (unsaved) AttendanceSummary from ``(date, check_in, check_out, full_day, is_holiday)`` rows.
+
+    Absences are not stored: ``recorded_days`` keeps which days have a row, and
+    ``AttendanceSummary.absences`` counts the past weekdays without one when it is read.
+    """
+    present = half = holidays = recorded = 0
+    hours = Decimal('0')
+    for date, check_in, check_out, full_day, is_holiday in rows:
+        recorded |= 1 << (date.day - 1)
+        if is_holiday:
+            holidays += 1
+        elif full_day:
+            present += 1
+        else:
+            half += 1
+        hours += worked_hours(check_in, check_out)
+    return AttendanceSummary(
+        employee_id=employee_id, year=year, month=month,
+        present_days=present, half_days=half, holidays=holidays, recorded_days=recorded,
+        worked_hours=hours.quantize(Decimal('0.01')),
+    )
+
+
+def refresh_attendance_summaries(keys):
+    """Recompute the summaries for a set of (employee_id, year, month) keys.
+
+    Reads the Attendance rows with one query per distinct month and writes every
+    summary with a single bulk upsert, so bulk imports cost a handful of statements.
+    Employees left with no rows in a month lose their summary, as in a full rebuild.
+    """
+    by_month = defaultdict(set)
+    for employee_id, year, month in keys:
+        if employee_id is not None:
+            by_month[(year, month)].add(employee_id)
+
+    summaries = []
+    for (year, month), employee_ids in by_month.items():
+        start, end = month_bounds(year, month)
+        rows = defaultdict(list)
+        qs = Attendance.objects.filter(employee_id__in=employee_ids, date__gte=start, date__lt=end)
+        for employee_id, *row in qs.values_list('employee_id', 'date', 'check_in', 'check_out', 'full_day', 'is_holiday'):
+            rows[employee_id].append(row)
+        summaries.extend(summarize(e, year, month, rows[e]) for e in employee_ids if e in rows)
+        emptied = employee_ids - set(rows)
+        if emptied:
+            AttendanceSummary.objects.filter(year=year, month=month, employee_id__in=emptied).delete()
+    if not summaries:
+        return 0
+
+    features = connections[AttendanceSummary.objects.db].features
+    if features.supports_update_conflicts:
+        kwargs = {}
+        if features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['employee', 'year', 'month']
+        AttendanceSummary.objects.bulk_create(summaries, update_conflicts=True,
+                                              update_fields=SUMMARY_UPDATE_FIELDS, **kwargs)
+    else:
+        for (year, month), employee_ids in by_month.items():
+            AttendanceSummary.objects.filter(year=year, month=month, employee_id__in=employee_ids).delete()
+        AttendanceSummary.objects.bulk_create(summaries)
+    return len(summaries)
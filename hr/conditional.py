@@ -0,0 +1,69 @@
+# Project/hr/conditional.py
+# ETag / Last-Modified for read-only API views, derived from hr.versions counters, plus an
+# opt-in response cache keyed on the same validators.
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .versions import get_versions
+
+# Django cache alias for serialized list/detail responses; None (the default) turns the cache off
+RESPONSE_CACHE = getattr(settings, 'HR_API_RESPONSE_CACHE', None)
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'HR_API_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def user_scope(user):
+    # responses differ per non-staff user (querysets are filtered to their own rows)
+    if user.is_authenticated and user.is_staff:
+        return 'staff'
+    return f'user:{user.pk}' if user.is_authenticated else 'anon'
+
+
+class ConditionalGetMixin:
+    """Adds validators to ``list`` / ``retrieve`` and answers matching conditional GETs with 304.
+
+    ``version_resources`` names every hr.versions counter the serialized output depends on;
+    any write to one of them changes the ETag (and the response cache key). The validators
+    are predictable, so a detail request first looks the object up: a missing or forbidden
+    pk gets its 404/403 whatever the request's preconditions say.
+    """
+    version_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()  # 404 / check_object_permissions before any 304
+        return self._conditional(request, lambda: Response(self.get_serializer(instance).data))
+
+    def _conditional(self, request, render):
+        versions = get_versions(self.version_resources)
+        key = '|'.join([
+            type(self).__name__, request.get_host(), request.get_full_path(), request.accepted_renderer.format,
+            user_scope(request.user), *(f'{name}={versions[name][0]}' for name in sorted(versions)),
+        ])
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        etag = f'"{digest}"'
+        changed = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+        last_modified = int(max(changed).timestamp()) if changed else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = caches[RESPONSE_CACHE] if RESPONSE_CACHE else None
+        data = cache.get(f'hr:api:{digest}') if cache is not None else None
+        if data is not None:
+            response = Response(data)
+        else:
+            response = render()
+            if cache is not None and response.status_code == 200:
+                cache.set(f'hr:api:{digest}', response.data, RESPONSE_CACHE_TIMEOUT)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
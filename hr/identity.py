@@ -0,0 +1,62 @@
+# Project/hr/identity.py
+# Which Employee the requesting user is, resolved once per request through Employee.user.
+from django.contrib.auth import get_user_model
+
+from .models import Employee
+from .versions import EMPLOYEE, bump_versions
+
+_CACHE_ATTR = '_hr_current_employee'
+_FIELDS = ('id', 'user_id', 'department_id')
+
+
+def get_current_employee(request):
+    """The ``Employee`` linked to ``request.user`` (only ``id``, ``user_id`` and
+    ``department_id`` loaded), or None. Cached on the request, so permission checks
+    and querysets share one lookup.
+
+    Only ``Employee.user`` is read: a login whose email happens to match an employee
+    gets nothing until HR links it (admin, or the link_employee_users command).
+    """
+    # DRF's Request proxies the HttpRequest; cache on the latter so both see it
+    http_request = getattr(request, '_request', request)
+    if not hasattr(http_request, _CACHE_ATTR):
+        user = request.user
+        employee = None
+        if user.is_authenticated:
+            employee = Employee.objects.filter(user_id=user.pk).only(*_FIELDS).first()
+        setattr(http_request, _CACHE_ATTR, employee)
+    return getattr(http_request, _CACHE_ATTR)
+
+
+def current_employee_id(request):
+    employee = get_current_employee(request)
+    return employee.pk if employee is not None else None
+
+
+def _by_email(rows):
+    # lower-cased email -> id, leaving out addresses shared by more than one row
+    found, shared = {}, set()
+    for pk, email in rows:
+        key = (email or '').strip().lower()
+        if not key:
+            continue
+        if key in found:
+            shared.add(key)
+        found[key] = pk
+    return {key: pk for key, pk in found.items() if key not in shared}
+
+
+def link_users_by_email(dry_run=False):
+    """Link unlinked employees to the unlinked login with the same email (case-insensitive).
+
+    Emails shared by several users or employees are skipped. An HR-run step, never done
+    on the request path. Returns the ``[(employee_id, user_id)]`` pairs linked.
+    """
+    User = get_user_model()
+    users = _by_email(User.objects.filter(employee__isnull=True).values_list('pk', 'email').iterator())
+    employees = _by_email(Employee.objects.filter(user__isnull=True).values_list('pk', 'email').iterator())
+    pairs = [(employee_id, users[key]) for key, employee_id in sorted(employees.items()) if key in users]
+    if pairs and not dry_run:
+        Employee.objects.bulk_update([Employee(pk=e, user_id=u) for e, u in pairs], ['user'])
+        bump_versions(EMPLOYEE)
+    return pairs
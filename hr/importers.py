@@ -0,0 +1,191 @@
+# Project/hr/importers.py
+import csv
+import json
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.dateparse import parse_date, parse_time
+
+from .attendance import refresh_attendance_summaries
+from .models import Attendance, Employee
+from .tracking import mark_dirty
+
+ATTENDANCE_BATCH_SIZE = getattr(settings, 'HR_ATTENDANCE_BATCH_SIZE', 2000)
+ATTENDANCE_UPDATE_FIELDS = ['check_in', 'check_out', 'full_day', 'is_holiday', 'from_punches']
+# cap on per-row errors echoed back; the failed count is always exact
+IMPORT_MAX_ERRORS = getattr(settings, 'HR_IMPORT_MAX_ERRORS', 1000)
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+_TRUE = {'1', 'true', 't', 'yes', 'y'}
+_FALSE = {'0', 'false', 'f', 'no', 'n'}
+
+
+def iter_csv_rows(lines):
+    for row in csv.DictReader(lines):
+        yield row
+
+
+def iter_jsonl_rows(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = {'_error': f'Invalid JSON: {exc}'}
+        if not isinstance(row, dict):
+            row = {'_error': 'Each line must be a JSON object.'}
+        yield row
+
+
+def iter_rows(lines, fmt):
+    if fmt == 'csv':
+        return iter_csv_rows(lines)
+    if fmt == 'jsonl':
+        return iter_jsonl_rows(lines)
+    raise ValueError(f'Unknown format {fmt!r}; expected one of {IMPORT_FORMATS}')
+
+
+def _parse_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError('Must be a boolean.')
+
+
+def _parse_optional_time(value):
+    if value is None or value == '':
+        return None
+    parsed = parse_time(str(value))
+    if parsed is None:
+        raise ValueError('Time has wrong format. Use hh:mm[:ss].')
+    return parsed
+
+
+def _build_attendance(row, employee_ids):
+    """Turn one input row into an unsaved Attendance, or return a DRF-style error dict."""
+    if '_error' in row:
+        return None, {'non_field_errors': [row['_error']]}
+    errors = {}
+    code = str(row.get('employee_code') or '').strip()
+    employee_id = employee_ids.get(code)
+    if not code:
+        errors['employee_code'] = ['This field is required.']
+    elif employee_id is None:
+        errors['employee_code'] = [f'Unknown employee_code {code!r}.']
+
+    date = None
+    try:
+        date = parse_date(str(row.get('date') or ''))
+    except ValueError:
+        pass
+    if date is None:
+        errors['date'] = ['Date has wrong format. Use YYYY-MM-DD.']
+
+    values = {}
+    for field, parse in (('check_in', _parse_optional_time), ('check_out', _parse_optional_time)):
+        try:
+            values[field] = parse(row.get(field))
+        except ValueError as exc:
+            errors[field] = [str(exc)]
+    for field, default in (('full_day', True), ('is_holiday', False)):
+        try:
+            values[field] = _parse_bool(row.get(field), default)
+        except ValueError as exc:
+            errors[field] = [str(exc)]
+
+    if errors:
+        return None, errors
+    return Attendance(employee_id=employee_id, date=date, **values), None
+
+
+def upsert_attendance(records, batch_size=None):
+    """Insert or update Attendance rows on the (employee, date) unique constraint."""
+    batch_size = batch_size or ATTENDANCE_BATCH_SIZE
+    if not records:
+        return
+    features = connections[Attendance.objects.db].features
+    if features.supports_update_conflicts:
+        kwargs = {}
+        if features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['employee', 'date']
+        Attendance.objects.bulk_create(records, batch_size=batch_size, update_conflicts=True,
+                                       update_fields=ATTENDANCE_UPDATE_FIELDS, **kwargs)
+    else:
+        existing = {
+            (e, d): pk for pk, e, d in Attendance.objects.filter(
+                employee_id__in={r.employee_id for r in records},
+                date__in={r.date for r in records},
+            ).values_list('pk', 'employee_id', 'date')
+        }
+        to_update = []
+        to_create = []
+        for r in records:
+            r.pk = existing.get((r.employee_id, r.date))
+            (to_update if r.pk else to_create).append(r)
+        Attendance.objects.bulk_create(to_create, batch_size=batch_size)
+        Attendance.objects.bulk_update(to_update, ATTENDANCE_UPDATE_FIELDS, batch_size=batch_size)
+    # bulk writes skip model signals, so do their bookkeeping explicitly
+    keys = {(r.employee_id, r.date.year, r.date.month) for r in records}
+    mark_dirty(keys)
+    refresh_attendance_summaries(keys)
+
+
+def import_attendance(rows, batch_size=None):
+    """Validate and upsert an iterable of attendance dicts in batches.
+
+    Rows need ``employee_code`` and ``date``; ``check_in``, ``check_out``, ``full_day``
+    and ``is_holiday`` are optional. Invalid rows are reported and skipped; a later row
+    for the same employee and date wins. Returns a report with counts, per-row errors
+    and throughput.
+    """
+    batch_size = batch_size or ATTENDANCE_BATCH_SIZE
+    started = time.monotonic()
+    employee_ids = dict(Employee.objects.values_list('employee_code', 'id'))
+    received = imported = failed = duplicates = 0
+    errors = []
+    batch = {}
+
+    def flush():
+        nonlocal imported
+        if batch:
+            with transaction.atomic():
+                upsert_attendance(list(batch.values()), batch_size=batch_size)
+            imported += len(batch)
+            batch.clear()
+
+    for row_number, row in enumerate(rows, start=1):
+        received += 1
+        record, row_errors = _build_attendance(row, employee_ids)
+        if row_errors:
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({'row': row_number, 'errors': row_errors})
+            continue
+        key = (record.employee_id, record.date)
+        if key in batch:
+            duplicates += 1
+        batch[key] = record
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    seconds = time.monotonic() - started
+    return {
+        'received': received,
+        'imported': imported,
+        'failed': failed,
+        'duplicates': duplicates,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(received / seconds, 1) if seconds else None,
+    }
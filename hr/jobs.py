@@ -0,0 +1,152 @@
+# Project/hr/jobs.py
+# Database-backed payroll job queue; jobs are run by the payroll_worker command.
+import datetime
+import logging
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PayrollJob, PayrollPeriod
+from .payroll import PeriodArchived, run_payroll
+
+logger = logging.getLogger('hr.jobs')
+
+# seconds without a heartbeat after which a running job counts as abandoned (its worker died)
+JOB_LEASE = getattr(settings, 'HR_PAYROLL_JOB_LEASE', 300)
+# runs an abandoned job gets before it is failed instead of requeued
+JOB_MAX_ATTEMPTS = getattr(settings, 'HR_PAYROLL_JOB_MAX_ATTEMPTS', 3)
+
+
+class PayrollJobConflict(Exception):
+    """A queued or running job already exists for the period."""
+
+    def __init__(self, job):
+        super().__init__(f'Payroll job {job.pk} is already {job.status} for this period.')
+        self.job = job
+
+
+def active_job(period):
+    return PayrollJob.objects.filter(payroll_period=period, status__in=PayrollJob.ACTIVE_STATUSES).first()
+
+
+def enqueue_payroll_job(year, month, finalize=False, user=None):
+    """Queue a payroll run for a period; raises PayrollJobConflict if one is already active
+    and PeriodArchived if the period is archived."""
+    period, _ = PayrollPeriod.objects.get_or_create(year=year, month=month)
+    if period.archived_at:
+        raise PeriodArchived(year, month)
+    existing = active_job(period)
+    if existing:
+        raise PayrollJobConflict(existing)
+    try:
+        with transaction.atomic():
+            return PayrollJob.objects.create(payroll_period=period, finalize=finalize, requested_by=user)
+    except IntegrityError:
+        # lost a race with another request; the partial unique constraint caught it
+        existing = active_job(period)
+        if existing is None:
+            raise
+        raise PayrollJobConflict(existing)
+
+
+def recover_stale_jobs(lease=None, max_attempts=None):
+    """Requeue running jobs whose heartbeat is older than ``lease`` seconds, or fail them once
+    they have used ``max_attempts`` runs. Returns ``(requeued, failed)``."""
+    lease = JOB_LEASE if lease is None else lease
+    max_attempts = JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+    now = timezone.now()
+    expired = now - datetime.timedelta(seconds=lease)
+    stale = PayrollJob.objects.filter(status=PayrollJob.RUNNING, heartbeat_at__lte=expired)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=PayrollJob.FAILED, finished_at=now,
+        error='Abandoned: the worker stopped sending heartbeats and the job is out of attempts.')
+    requeued = stale.update(status=PayrollJob.QUEUED, heartbeat_at=None, processed=0, total=0)
+    if requeued or failed:
+        logger.warning('Recovered abandoned payroll jobs: %s requeued, %s failed', requeued, failed)
+    return requeued, failed
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running; returns it, or None if the queue is empty.
+
+    Abandoned running jobs (see ``recover_stale_jobs``) are requeued first.
+    """
+    recover_stale_jobs()
+    for job_id in PayrollJob.objects.filter(status=PayrollJob.QUEUED).order_by('id').values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        claimed = PayrollJob.objects.filter(pk=job_id, status=PayrollJob.QUEUED).update(
+            status=PayrollJob.RUNNING, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return PayrollJob.objects.select_related('payroll_period').get(pk=job_id)
+    return None
+
+
+def _heartbeat(job, stop):
+    # own thread, own DB connection: keeps the lease while run_payroll sits in long queries or writes
+    try:
+        while not stop.wait(JOB_LEASE / 3):
+            try:
+                _owned(job).update(heartbeat_at=timezone.now())
+            except Exception:
+                logger.exception('Payroll job %s heartbeat failed', job.pk)
+    finally:
+        connection.close()
+
+
+def _owned(job):
+    # this run's row: a job requeued after a lost lease has moved on to another attempt
+    return PayrollJob.objects.filter(pk=job.pk, status=PayrollJob.RUNNING, attempts=job.attempts)
+
+
+def _job_timings(result):
+    timings = {f'{phase}_ms': round(seconds * 1000, 3) for phase, seconds in result['timings'].items()}
+    if result['employees_per_second'] is not None:
+        timings['employees_per_second'] = round(result['employees_per_second'], 1)
+    return timings
+
+
+def run_job(job):
+    period = job.payroll_period
+
+    def progress(done, total):
+        # runs outside the payroll write transaction, so pollers see it immediately
+        _owned(job).update(processed=done, total=total, heartbeat_at=timezone.now())
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job, stop), name=f'payroll-job-{job.pk}-heartbeat', daemon=True)
+    beat.start()
+    try:
+        result = run_payroll(period.year, period.month, finalize=job.finalize, progress=progress)
+    except Exception:
+        logger.exception('Payroll job %s failed', job.pk)
+        _owned(job).update(status=PayrollJob.FAILED, error=traceback.format_exc(), finished_at=timezone.now())
+    else:
+        count = len(result['payslips'])
+        # run_payroll's in-process metrics die with this worker; the job row keeps them for /api/metrics/
+        _owned(job).update(status=PayrollJob.SUCCEEDED, processed=count, total=count,
+                           finished_at=timezone.now(), timings=_job_timings(result))
+    finally:
+        stop.set()
+        beat.join()
+    job.refresh_from_db()
+    return job
+
+
+def run_worker(poll_interval=2.0, once=False, max_jobs=None):
+    """Claim and run queued jobs until stopped; with ``once`` return when the queue is empty."""
+    handled = 0
+    while max_jobs is None or handled < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        handled += 1
+    return handled
@@ -0,0 +1,55 @@
+# Project/hr/management/commands/archive_payroll_period.py
+from django.core.management.base import BaseCommand, CommandError
+from hr.archive import ArchiveError, archive_paths, archive_period, verify_archive
+from hr.models import PayrollPeriod
+
+class Command(BaseCommand):
+    help = 'Write finalized payroll periods to compressed, checksummed archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Payroll year')
+        parser.add_argument('--month', type=int, help='Payroll month (requires --year)')
+        parser.add_argument('--all-finalized', action='store_true', help='Archive every finalized period not yet archived')
+        parser.add_argument('--prune', action='store_true', help='Delete the archived payslip rows from the database')
+        parser.add_argument('--force', action='store_true', help='Rewrite an existing archive (payslip rows must still exist)')
+        parser.add_argument('--verify', action='store_true', help='Only check archived files against their checksums')
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if options['all_finalized']:
+            if year or month:
+                raise CommandError('--all-finalized cannot be combined with --year/--month')
+            periods = PayrollPeriod.objects.filter(finalized=True)
+            if options['verify']:
+                periods = periods.filter(archived_at__isnull=False)
+            elif not (options['force'] or options['prune']):
+                periods = periods.filter(archived_at__isnull=True)
+        else:
+            if not year or not month:
+                raise CommandError('Pass --year and --month, or --all-finalized')
+            periods = PayrollPeriod.objects.filter(year=year, month=month)
+            if not periods.exists():
+                raise CommandError(f'No payroll period {year}-{month:02d}')
+
+        failed = 0
+        for period in periods.order_by('year', 'month'):
+            label = f'{period.year}-{period.month:02d}'
+            try:
+                if options['verify']:
+                    if not period.archived_at:
+                        raise ArchiveError(f'Payroll period {label} is not archived.')
+                    verify_archive(period)
+                    self.stdout.write(f'{label}: ok')
+                    continue
+                index = archive_period(period, prune=options['prune'], force=options['force'])
+            except ArchiveError as exc:
+                failed += 1
+                self.stderr.write(f'{label}: {exc}')
+                continue
+            data_path, _ = archive_paths(period.year, period.month)
+            pruned = ', payslip rows pruned' if options['prune'] else ''
+            self.stdout.write(f"{label}: {index['rows']} payslips in {data_path} "
+                              f"({len(index['blocks'])} blocks){pruned}")
+        if failed:
+            raise CommandError(f'{failed} payroll period(s) failed')
+        self.stdout.write(self.style.SUCCESS('Done'))
@@ -0,0 +1,118 @@
+# Project/hr/management/commands/benchmark_payroll.py
+import datetime
+import json
+import platform
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from hr.models import Attendance, Deduction, Department, Employee, LeaveRequest, OvertimeRecord, PayrollPeriod
+from hr.payroll import generate_payroll_for_period
+from hr.synthetic import seed_synthetic_workforce
+
+class Command(BaseCommand):
+    help = ('Benchmark payroll generation, CSV/XLSX export and the payslip list API on synthetic '
+            'workforces of several sizes, in a throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma separated employee counts (default 1000,10000,100000)')
+        parser.add_argument('--departments', type=int, default=20, help='Departments per workforce')
+        parser.add_argument('--year', type=int, default=2025)
+        parser.add_argument('--month', type=int, default=1)
+        parser.add_argument('--output', default='bench_results.json', help='JSON results file')
+        parser.add_argument('--no-memory', action='store_true',
+                            help='Skip tracemalloc peak memory tracking (it slows Python code down)')
+
+    def measure(self, name, fn, track_memory):
+        reset_queries()
+        if track_memory:
+            tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                detail = fn()
+                seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+        finally:
+            if track_memory:
+                tracemalloc.stop()
+        result = {'seconds': round(seconds, 4), 'queries': len(queries), 'peak_memory_bytes': peak}
+        if detail:
+            result.update(detail)
+        self.stdout.write(f'  {name:<20} {seconds:9.3f}s  {len(queries):6d} queries'
+                          + (f'  {peak / 1e6:9.1f} MB peak' if peak is not None else ''))
+        return result
+
+    def reset(self):
+        for model in (PayrollPeriod, Attendance, OvertimeRecord, LeaveRequest, Deduction, Employee, Department):
+            model.objects.all().delete()
+
+    def run_size(self, size, options, client):
+        year, month = options['year'], options['month']
+        track_memory = not options['no_memory']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size} employees'))
+        self.reset()
+        started = time.perf_counter()
+        with transaction.atomic():
+            counts = seed_synthetic_workforce(size, departments=options['departments'], year=year, month=month,
+                                              seed=size, prefix='BENCH')
+        result = {'employees': size, 'rows': counts, 'seed_seconds': round(time.perf_counter() - started, 2),
+                  'operations': {}}
+
+        def download(url):
+            def fetch():
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'GET {url} returned {response.status_code}')
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                return {'bytes': len(body)}
+            return fetch
+
+        ops = result['operations']
+        ops['generate_payroll'] = self.measure(
+            'generate_payroll', lambda: {'payslips': len(generate_payroll_for_period(year, month))}, track_memory)
+        ops['regenerate_payroll'] = self.measure(
+            'regenerate_payroll', lambda: {'payslips': len(generate_payroll_for_period(year, month))}, track_memory)
+        ops['export_csv'] = self.measure('export_csv', download(f'/api/export/{year}/{month}/'), track_memory)
+        ops['export_xlsx'] = self.measure('export_xlsx', download(f'/api/export/xlsx/{year}/{month}/'), track_memory)
+        ops['payslip_list'] = self.measure(
+            'payslip_list', download(f'/api/payslips/?year={year}&month={month}&page_size=500'), track_memory)
+        return result
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma separated list of integers')
+
+        # DEBUG off, or every seeding query would fill the query log CaptureQueriesContext relies on
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        results = []
+        try:
+            user = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+            client = Client()
+            client.force_login(user)
+            for size in sizes:
+                results.append(self.run_size(size, options, client))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'generated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'memory_tracked': not options['no_memory'],
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
@@ -0,0 +1,26 @@
+# Project/hr/management/commands/compact_punches.py
+import time
+
+from django.core.management.base import BaseCommand
+from hr.punches import compact_punches
+
+class Command(BaseCommand):
+    help = 'Fold new punch events into Attendance (first in, last out); run on demand or with --every'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Events per transaction')
+        parser.add_argument('--lag', type=float, default=None,
+                            help='Leave events stored less than this many seconds ago for the next run')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Keep running, compacting every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            report = compact_punches(batch_size=options['batch_size'], lag=options['lag'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Folded {report['events']} punch events into {report['days']} attendance days "
+                f"in {report['batches']} batches (watermark {report['last_event_id']})"
+            ))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,38 @@
+# Project/hr/management/commands/import_attendance.py
+import io
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from hr.importers import IMPORT_FORMATS, import_attendance, iter_rows
+
+class Command(BaseCommand):
+    help = 'Bulk import attendance rows from a CSV or JSON-lines file (upserts on employee + date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                            help='Input format (default: from the file extension, csv otherwise)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per bulk upsert')
+        parser.add_argument('--report', help='Write the full JSON report (including row errors) to this file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        try:
+            fh = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8') if path == '-' else open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with fh:
+            report = import_attendance(iter_rows(fh, fmt), batch_size=options['batch_size'])
+
+        if options['report']:
+            with open(options['report'], 'w') as out:
+                json.dump(report, out, indent=2)
+        for error in report['errors'][:20]:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        style = self.style.SUCCESS if not report['failed'] else self.style.WARNING
+        self.stdout.write(style(
+            f"Imported {report['imported']} of {report['received']} rows "
+            f"({report['failed']} failed) in {report['seconds']}s, {report['rows_per_second']} rows/s"
+        ))
@@ -0,0 +1,18 @@
+# Project/hr/management/commands/link_employee_users.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from hr.identity import link_users_by_email
+
+class Command(BaseCommand):
+    help = 'Link unlinked employees to the login with the same email (case-insensitive) for self-service'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only list the links that would be made')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            pairs = link_users_by_email(dry_run=options['dry_run'])
+        for employee_id, user_id in pairs:
+            self.stdout.write(f'employee {employee_id} -> user {user_id}')
+        verb = 'Would link' if options['dry_run'] else 'Linked'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(pairs)} employee(s)'))
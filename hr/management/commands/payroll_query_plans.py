@@ -0,0 +1,57 @@
+# Project/hr/management/commands/payroll_query_plans.py
+import time
+
+from django.core.management.base import BaseCommand
+from hr.models import Deduction, Employee, LeaveRequest, OvertimeRecord
+from hr.payroll import _grouped_sum, period_input_querysets
+
+class Command(BaseCommand):
+    help = ('Show query plans and timings for the payroll period filters: the old '
+            'date__year/date__month predicates against the half-open date ranges used now')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True, help='Year, e.g. 2025')
+        parser.add_argument('--month', type=int, required=True, help='Month number (1-12)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed executions per query')
+
+    def legacy_querysets(self, year, month, employees):
+        employee_ids = employees.order_by().values('pk')
+        return {
+            'overtime_hours': (
+                OvertimeRecord.objects.filter(employee__in=employee_ids, date__year=year, date__month=month, approved=True),
+                'hours'),
+            'unpaid_days': (
+                LeaveRequest.objects.filter(employee__in=employee_ids, status=LeaveRequest.APPROVED, unpaid=True,
+                                            start_date__year=year, start_date__month=month),
+                'days'),
+            'manual_deductions': (
+                Deduction.objects.filter(employee__in=employee_ids, date__year=year, date__month=month),
+                'amount'),
+        }
+
+    def timed(self, qs, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(qs.all())  # fresh queryset each time, no result cache
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000
+
+    def handle(self, *args, **options):
+        year = options['year']
+        month = options['month']
+        employees = Employee.objects.filter(is_active=True)
+        variants = {
+            'date__year/date__month': self.legacy_querysets(year, month, employees),
+            'half-open range': period_input_querysets(year, month, employees),
+        }
+        for name in ('overtime_hours', 'unpaid_days', 'manual_deductions'):
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, querysets in variants.items():
+                qs, field = querysets[name]
+                if field:
+                    qs = _grouped_sum(qs, field)
+                self.stdout.write(f'  [{label}] best of {options["repeat"]}: {self.timed(qs, options["repeat"]):.2f} ms')
+                for line in qs.explain().splitlines():
+                    self.stdout.write(f'    {line}')
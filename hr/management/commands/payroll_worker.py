@@ -0,0 +1,16 @@
+# Project/hr/management/commands/payroll_worker.py
+from django.core.management.base import BaseCommand
+from hr.jobs import run_worker
+
+class Command(BaseCommand):
+    help = 'Run queued payroll jobs (polls the PayrollJob table; no external broker needed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between polls when idle')
+        parser.add_argument('--max-jobs', type=int, default=None, help='Exit after running this many jobs')
+
+    def handle(self, *args, **options):
+        handled = run_worker(poll_interval=options['poll_interval'], once=options['once'],
+                             max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f'Ran {handled} payroll job(s)'))
@@ -0,0 +1,44 @@
+# Project/hr/management/commands/rebuild_attendance_summary.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import ExtractMonth, ExtractYear
+from hr.attendance import refresh_attendance_summaries
+from hr.models import Attendance, AttendanceSummary
+
+class Command(BaseCommand):
+    help = 'Rebuild monthly attendance summaries from Attendance rows (backfill or repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year')
+        parser.add_argument('--month', type=int, help='Only rebuild this month (requires --year)')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Summaries recomputed per batch')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        month = options['month']
+        if month and not year:
+            raise CommandError('--month requires --year')
+
+        attendance = Attendance.objects.all()
+        summaries = AttendanceSummary.objects.all()
+        if year:
+            attendance = attendance.filter(date__year=year)
+            summaries = summaries.filter(year=year)
+        if month:
+            attendance = attendance.filter(date__month=month)
+            summaries = summaries.filter(month=month)
+
+        keys = (attendance.annotate(y=ExtractYear('date'), m=ExtractMonth('date'))
+                .order_by().values_list('employee_id', 'y', 'm').distinct())
+        total = 0
+        with transaction.atomic():
+            # drop summaries whose attendance rows are all gone, then recompute the rest
+            summaries.delete()
+            chunk = []
+            for key in keys.iterator(chunk_size=options['chunk_size']):
+                chunk.append(key)
+                if len(chunk) >= options['chunk_size']:
+                    total += refresh_attendance_summaries(chunk)
+                    chunk = []
+            total += refresh_attendance_summaries(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} attendance summaries'))
@@ -0,0 +1,29 @@
+# Project/hr/management/commands/rebuild_payroll_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hr.models import PayrollPeriod
+from hr.rollups import refresh_payroll_rollups
+
+class Command(BaseCommand):
+    help = 'Rebuild department payroll rollups from Payslip rows (backfill or repair)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year')
+        parser.add_argument('--month', type=int, help='Only rebuild this month (requires --year)')
+
+    def handle(self, *args, **options):
+        year = options['year']
+        month = options['month']
+        if month and not year:
+            raise CommandError('--month requires --year')
+
+        periods = PayrollPeriod.objects.order_by('year', 'month')
+        if year:
+            periods = periods.filter(year=year)
+        if month:
+            periods = periods.filter(month=month)
+        total = 0
+        for period in periods:
+            with transaction.atomic():
+                total += refresh_payroll_rollups(period)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} rollups for {periods.count()} payroll periods'))
@@ -0,0 +1,18 @@
+# Project/hr/management/commands/recover_payroll_jobs.py
+from django.core.management.base import BaseCommand
+from hr.jobs import JOB_LEASE, JOB_MAX_ATTEMPTS, recover_stale_jobs
+
+class Command(BaseCommand):
+    help = 'Requeue (or fail) running payroll jobs whose worker stopped sending heartbeats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lease', type=float, default=JOB_LEASE,
+                            help='Seconds without a heartbeat before a job counts as abandoned '
+                                 '(0 resets every running job; only use it when no worker is alive)')
+        parser.add_argument('--fail', action='store_true', help='Mark abandoned jobs failed instead of requeueing them')
+
+    def handle(self, *args, **options):
+        # --fail: every abandoned job has used up its attempts
+        max_attempts = 0 if options['fail'] else JOB_MAX_ATTEMPTS
+        requeued, failed = recover_stale_jobs(lease=options['lease'], max_attempts=max_attempts)
+        self.stdout.write(self.style.SUCCESS(f'Requeued {requeued} and failed {failed} abandoned payroll job(s)'))
@@ -0,0 +1,39 @@
+# Project/hr/management/commands/render_payslips.py
+from django.core.management.base import BaseCommand, CommandError
+from hr import pdf
+from hr.models import Payslip, PayrollPeriod
+
+class Command(BaseCommand):
+    help = 'Render every payslip of a payroll period to PDF and bundle them in a ZIP archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True, help='Year, e.g. 2025')
+        parser.add_argument('--month', type=int, required=True, help='Month number (1-12)')
+        parser.add_argument('--output', help='ZIP file to write (default payslips_<year>_<month>.zip)')
+        parser.add_argument('--workers', type=int, default=None, help='Renderer processes (default HR_PDF_WORKERS / CPU count)')
+
+    def handle(self, *args, **options):
+        if pdf.HTML is None:
+            raise CommandError('WeasyPrint not available. Install weasyprint and its system deps.')
+        year = options['year']
+        month = options['month']
+        period = PayrollPeriod.objects.filter(year=year, month=month).first()
+        if not period:
+            raise CommandError(f'No payroll data found for {year}-{month:02d}.')
+
+        output = options['output'] or f'payslips_{year}_{month}.zip'
+        payslips = (Payslip.objects.filter(payroll_period=period)
+                    .select_related('employee', 'payroll_period').order_by('pk'))
+        count = 0
+
+        def counted(entries):
+            nonlocal count
+            for entry in entries:
+                count += 1
+                yield entry
+
+        with open(output, 'wb') as fh:
+            for chunk in pdf.stream_zip(counted(pdf.iter_payslip_pdfs(payslips.iterator(chunk_size=500),
+                                                                      workers=options['workers']))):
+                fh.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Rendered {count} payslips for {year}-{month:02d} into {output}'))
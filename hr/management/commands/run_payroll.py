@@ -1,6 +1,7 @@
 # Project/hr/management/commands/run_payroll.py
-from django.core.management.base import BaseCommand
-from hr.payroll import generate_payroll_for_period
+from django.core.management.base import BaseCommand, CommandError
+from hr.parallel import SHARD_BY_CHOICES
+from hr.payroll import run_payroll
 
 class Command(BaseCommand):
     help = 'Generate payroll for a given year and month'
@@ -9,10 +10,29 @@ class Command(BaseCommand):
         parser.add_argument('--year', type=int, required=True, help='Year, e.g. 2025')
         parser.add_argument('--month', type=int, required=True, help='Month number (1-12)')
         parser.add_argument('--finalize', action='store_true', help='Finalize the payroll period')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only recompute employees whose inputs changed since the last run')
+        parser.add_argument('--batch-size', type=int, default=None, help='Payslip rows per bulk write statement')
+        parser.add_argument('--workers', type=int, default=1, help='Compute in N worker processes (default 1)')
+        parser.add_argument('--shard-by', choices=SHARD_BY_CHOICES, default='id-range',
+                            help='How to split employees between workers')
 
     def handle(self, *args, **options):
         year = options['year']
         month = options['month']
         finalize = options['finalize']
-        payslips = generate_payroll_for_period(year, month, finalize=finalize)
-        self.stdout.write(self.style.SUCCESS(f'Generated {len(payslips)} payslips for {year}-{month:02d}'))
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        result = run_payroll(year, month, finalize=finalize, batch_size=options['batch_size'],
+                             workers=options['workers'], shard_by=options['shard_by'],
+                             incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(result['payslips'])} payslips for {year}-{month:02d} "
+            f"({result['created']} created, {result['updated']} updated, {result['removed']} removed)"
+        ))
+        timings = result['timings']
+        rate = result['employees_per_second']
+        self.stdout.write(
+            f"fetch {timings['fetch']:.2f}s, compute {timings['compute']:.2f}s, persist {timings['persist']:.2f}s, "
+            f"total {timings['total']:.2f}s" + (f" ({rate:.0f} employees/s)" if rate else '')
+        )
@@ -0,0 +1,31 @@
+# Project/hr/management/commands/seed_synthetic_hr.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from hr.synthetic import seed_synthetic_workforce
+
+class Command(BaseCommand):
+    help = 'Bulk insert a synthetic workforce with one month of attendance, overtime, leave and deductions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, required=True, help='Number of employees to create')
+        parser.add_argument('--departments', type=int, default=10, help='Number of departments (default 10)')
+        parser.add_argument('--year', type=int, help='Year of the generated activity (default: current)')
+        parser.add_argument('--month', type=int, help='Month of the generated activity (default: current)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data')
+        parser.add_argument('--prefix', default='SYN', help='Employee code / department name prefix')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        if options['employees'] < 1 or options['departments'] < 1:
+            raise CommandError('--employees and --departments must be at least 1')
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = seed_synthetic_workforce(
+                options['employees'], departments=options['departments'], year=options['year'],
+                month=options['month'], seed=options['seed'], prefix=options['prefix'],
+                batch_size=options['batch_size'],
+            )
+        summary = ', '.join(f'{n} {name}' for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.monotonic() - started:.1f}s'))
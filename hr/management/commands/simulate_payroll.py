@@ -0,0 +1,69 @@
+# Project/hr/management/commands/simulate_payroll.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from hr.simulation import OVERRIDE_FIELDS, TOTAL_FIELDS, simulate_payroll, simulation_json
+
+
+def _assignment(value):
+    field, sep, amount = value.partition('=')
+    if not sep:
+        raise ValueError(f'{value!r}: expected FIELD=VALUE')
+    return field, amount
+
+
+def _keyed_assignment(value):
+    key, sep, rest = value.partition(':')
+    if not sep:
+        raise ValueError(f'{value!r}: expected ID:FIELD=VALUE')
+    return key, *_assignment(rest)
+
+
+class Command(BaseCommand):
+    help = 'Simulate a payroll period with overridden pay inputs without saving anything'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, required=True, help='Year, e.g. 2025')
+        parser.add_argument('--month', type=int, required=True, help='Month number (1-12)')
+        parser.add_argument('--overtime-rate', default=None, help='Overtime multiplier (default 1.5)')
+        parser.add_argument('--daily-hours', default=None, help='Hours in a working day (default 8)')
+        parser.add_argument('--set', action='append', default=[], metavar='FIELD=VALUE',
+                            help=f"Override for every employee; FIELD is one of {', '.join(OVERRIDE_FIELDS)}")
+        parser.add_argument('--department', action='append', default=[], metavar='ID:FIELD=VALUE',
+                            help='Override for one department')
+        parser.add_argument('--employee', action='append', default=[], metavar='ID:FIELD=VALUE',
+                            help='Override for one employee')
+        parser.add_argument('--database', default=None, help='Database alias to read (default HR_SIMULATION_DB)')
+        parser.add_argument('--limit', type=int, default=20, help='Employee changes to list (default 20)')
+        parser.add_argument('--json', action='store_true', help='Print the full result as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            everyone = dict(_assignment(v) for v in options['set'])
+            departments, employees = {}, {}
+            for target, values in ((departments, options['department']), (employees, options['employee'])):
+                for key, field, amount in map(_keyed_assignment, values):
+                    target.setdefault(key, {})[field] = amount
+            result = simulate_payroll(options['year'], options['month'], employees=employees,
+                                      departments=departments, all_employees=everyone,
+                                      overtime_rate=options['overtime_rate'], daily_hours=options['daily_hours'],
+                                      using=options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(simulation_json(result), indent=2))
+            return
+        totals = result['totals']
+        self.stdout.write(f"{result['year']}-{result['month']:02d}: {result['employees']} employees, "
+                          f"{result['changed']} changed")
+        for field in TOTAL_FIELDS:
+            self.stdout.write(f"  {field:<17} {totals['baseline'][field]:>15} -> {totals['simulated'][field]:>15} "
+                              f"({totals['delta'][field]:+})")
+        changes = sorted(result['changes'], key=lambda c: abs(c['delta']['net_pay']), reverse=True)
+        for change in changes[:options['limit']]:
+            self.stdout.write(f"  {change['employee_code']:<12} net {change['baseline']['net_pay']} -> "
+                              f"{change['simulated']['net_pay']} ({change['delta']['net_pay']:+})")
+        for kind, ids in result['unmatched'].items():
+            if ids:
+                self.stdout.write(self.style.WARNING(f"No active {kind} with id {', '.join(map(str, ids))}"))
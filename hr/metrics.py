@@ -0,0 +1,94 @@
+# Project/hr/metrics.py
+# In-process rolling metrics for the hr API and payroll runs (no external services).
+import math
+import threading
+from collections import deque
+
+from django.conf import settings
+
+# samples kept per series; older samples roll off
+METRICS_WINDOW = getattr(settings, 'HR_METRICS_WINDOW', 1000)
+# histogram bucket upper bounds, in the series' own unit (ms for timings)
+METRICS_BUCKETS = getattr(settings, 'HR_METRICS_BUCKETS',
+                          (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000))
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    index = max(0, math.ceil(q * len(ordered)) - 1)
+    return ordered[index]
+
+
+class RollingHistogram:
+    """The last ``window`` observations of one series, summarised on demand."""
+
+    def __init__(self, window=METRICS_WINDOW, buckets=METRICS_BUCKETS):
+        self._samples = deque(maxlen=window)
+        self._buckets = tuple(buckets)
+        self._total_count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._samples.append(float(value))
+            self._total_count += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = list(self._samples)
+            total_count = self._total_count
+        ordered = sorted(samples)
+        buckets = {}
+        for bound in self._buckets:
+            buckets[str(bound)] = sum(1 for v in ordered if v <= bound)
+        buckets['+Inf'] = len(ordered)
+        return {
+            'count': total_count,
+            'window': len(ordered),
+            'min': ordered[0] if ordered else None,
+            'max': ordered[-1] if ordered else None,
+            'mean': sum(ordered) / len(ordered) if ordered else None,
+            'p50': _percentile(ordered, 0.50),
+            'p90': _percentile(ordered, 0.90),
+            'p99': _percentile(ordered, 0.99),
+            'buckets': buckets,  # cumulative: samples <= bound
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        series = self._series.get(name)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(name, RollingHistogram())
+        series.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            series = dict(self._series)
+        return {name: hist.snapshot() for name, hist in sorted(series.items())}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+registry = MetricsRegistry()
+
+
+def payroll_job_metrics(limit=None):
+    """Phase timings of the most recent successful payroll jobs, as stored on ``PayrollJob``
+    by whichever worker ran them (the registry only sees runs made in this process)."""
+    from .models import PayrollJob
+    limit = limit or METRICS_WINDOW
+    series = {}
+    jobs = PayrollJob.objects.filter(status=PayrollJob.SUCCEEDED).order_by('-id').values_list('timings', flat=True)
+    for timings in jobs[:limit]:
+        for name, value in (timings or {}).items():
+            series.setdefault(f'payroll_job {name}', RollingHistogram(window=limit)).observe(value)
+    return {name: hist.snapshot() for name, hist in sorted(series.items())}
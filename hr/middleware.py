@@ -0,0 +1,78 @@
+# Project/hr/middleware.py
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import registry
+
+logger = logging.getLogger('hr.metrics')
+
+# only requests under this prefix are instrumented
+METRICS_PATH_PREFIX = getattr(settings, 'HR_METRICS_PATH_PREFIX', '/api/')
+
+
+class _QueryCounter:
+    # connection.execute_wrapper() hook: counts statements and the time spent in them
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryMetricsMiddleware:
+    """Report SQL count, SQL time and latency of hr API requests.
+
+    Adds ``X-SQL-Count``, ``X-SQL-Time-ms``, ``X-Response-Time-ms`` and ``Server-Timing``
+    headers, logs one structured ``hr.metrics`` record per request and feeds the rolling
+    histograms behind the metrics endpoint. Streaming bodies are produced after the
+    response leaves the middleware, so their queries are not included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(METRICS_PATH_PREFIX):
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        sql_ms = counter.seconds * 1000
+
+        response['X-SQL-Count'] = str(counter.count)
+        response['X-SQL-Time-ms'] = f'{sql_ms:.2f}'
+        response['X-Response-Time-ms'] = f'{total_ms:.2f}'
+        response['Server-Timing'] = f'sql;dur={sql_ms:.2f}, total;dur={total_ms:.2f}'
+
+        # group by URL name (e.g. payslip-list), not the concrete path with its ids
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name or match.route) if match is not None else request.path
+        series = f'http {request.method} {route}'
+        registry.observe(f'{series} latency_ms', total_ms)
+        registry.observe(f'{series} sql_ms', sql_ms)
+        registry.observe(f'{series} sql_count', counter.count)
+        logger.info(
+            '%s %s %s sql_count=%d sql_ms=%.2f total_ms=%.2f',
+            request.method, request.path, response.status_code, counter.count, sql_ms, total_ms,
+            extra={
+                'method': request.method, 'path': request.path, 'route': route,
+                'status': response.status_code, 'sql_count': counter.count,
+                'sql_ms': round(sql_ms, 2), 'total_ms': round(total_ms, 2),
+            },
+        )
+        return response
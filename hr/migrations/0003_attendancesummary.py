@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0002_payrolldirtyemployee'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('half_days', models.PositiveIntegerField(default=0)),
+                ('holidays', models.PositiveIntegerField(default=0)),
+                ('recorded_days', models.PositiveIntegerField(default=0)),
+                ('worked_hours', models.DecimalField(decimal_places=2, default=0, max_digits=7)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='hr.employee')),
+            ],
+            options={
+                'unique_together': {('employee', 'year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0003_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deduction',
+            index=models.Index(fields=['employee', 'date'], name='hr_deduction_emp_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['employee', 'status', 'unpaid', 'start_date'], name='hr_leave_emp_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerecord',
+            index=models.Index(fields=['employee', 'date'], name='hr_overtime_emp_date_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:05
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+MONEY_FIELDS = ('basic', 'hra', 'other_allowances', 'overtime_hours', 'overtime_pay',
+                'pf', 'tax', 'manual_deductions', 'unpaid_deduction')
+BATCH_SIZE = 1000
+# calculate_payslip wrote these as a bare '0' when there was nothing to compute
+BARE_ZERO_FIELDS = ('overtime_hours', 'pf', 'tax')
+
+
+def _decimal(value):
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal('0')
+
+
+def _rewrite(apps, schema_editor, fields, convert):
+    Payslip = apps.get_model('hr', 'Payslip')
+    manager = Payslip.objects.using(schema_editor.connection.alias)
+    batch = []
+    for payslip in manager.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        convert(payslip)
+        batch.append(payslip)
+        if len(batch) >= BATCH_SIZE:
+            manager.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        manager.bulk_update(batch, fields)
+
+
+def details_to_columns(apps, schema_editor):
+    def convert(payslip):
+        details = payslip.details or {}
+        for name in MONEY_FIELDS:
+            setattr(payslip, name, _decimal(details.get(name, 0)))
+        payslip.days_in_month = int(details.get('days_in_month') or 0)
+    _rewrite(apps, schema_editor, MONEY_FIELDS + ('days_in_month',), convert)
+
+
+def _detail(name, value):
+    return '0' if name in BARE_ZERO_FIELDS and value == 0 else str(value)
+
+
+def columns_to_details(apps, schema_editor):
+    def convert(payslip):
+        payslip.details = {name: _detail(name, getattr(payslip, name)) for name in MONEY_FIELDS}
+        payslip.details['days_in_month'] = payslip.days_in_month
+    _rewrite(apps, schema_editor, ['details'], convert)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0005_payrolljob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payslip',
+            name='basic',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='hra',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='other_allowances',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='overtime_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='overtime_pay',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='pf',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='tax',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='manual_deductions',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='unpaid_deduction',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='payslip',
+            name='days_in_month',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(details_to_columns, columns_to_details),
+        migrations.RemoveField(
+            model_name='payslip',
+            name='details',
+        ),
+    ]
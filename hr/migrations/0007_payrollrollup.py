@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0006_payslip_breakdown_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department_name', models.CharField(blank=True, max_length=100)),
+                ('headcount', models.PositiveIntegerField(default=0)),
+                ('gross_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('net_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('overtime_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pf', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tax', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('manual_deductions', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unpaid_deduction', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payroll_rollups', to='hr.department')),
+                ('payroll_period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='hr.payrollperiod')),
+            ],
+            options={
+                'unique_together': {('payroll_period', 'department')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0007_payrollrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='archive_sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='payrollperiod',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
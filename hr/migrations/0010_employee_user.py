@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of hr.identity._by_email as it was when this migration was written;
+# migrations must not import app code that may change later.
+def _by_email(rows):
+    # lower-cased email -> id, leaving out addresses shared by more than one row
+    found, shared = {}, set()
+    for pk, email in rows:
+        key = (email or '').strip().lower()
+        if not key:
+            continue
+        if key in found:
+            shared.add(key)
+        found[key] = pk
+    return {key: pk for key, pk in found.items() if key not in shared}
+
+
+def link_users_by_email(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    Employee = apps.get_model('hr', 'Employee')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    users = _by_email(User.objects.using(alias).values_list('pk', 'email').iterator())
+    employees = _by_email(Employee.objects.using(alias).values_list('pk', 'email').iterator())
+    links = [Employee(pk=employee_id, user_id=users[key]) for key, employee_id in employees.items() if key in users]
+    Employee.objects.using(alias).bulk_update(links, ['user'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0009_resourceversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employee', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_users_by_email, migrations.RunPython.noop),
+    ]
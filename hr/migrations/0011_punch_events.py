@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0010_employee_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='from_punches',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='PunchCompaction',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_event_id', models.PositiveBigIntegerField(default=0)),
+                ('events', models.PositiveBigIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('punched_at', models.DateTimeField()),
+                ('direction', models.CharField(blank=True, choices=[('in', 'In'), ('out', 'Out')], max_length=3)),
+                ('terminal', models.CharField(blank=True, max_length=50)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punch_events', to='hr.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee', 'punched_at'], name='hr_punch_employee_time_idx')],
+            },
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
+import datetime
+from calendar import monthrange
 
 class Department(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -16,6 +18,9 @@ class Employee(models.Model):
     last_name = models.CharField(max_length=100, blank=True)
     employee_code = models.CharField(max_length=20, unique=True)
     email = models.EmailField(unique=True)
+    # login used for self-service (see hr.identity); set by HR or the link_employee_users command
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='employee')
     date_of_joining = models.DateField()
     is_active = models.BooleanField(default=True)
     # Salary info
@@ -33,6 +38,8 @@ class Attendance(models.Model):
     check_out = models.TimeField(null=True, blank=True)
     full_day = models.BooleanField(default=True)  # or compute from times
     is_holiday = models.BooleanField(default=False)
+    # built by hr.punches compaction; rows entered by HR (API, admin, imports) are never overwritten by punches
+    from_punches = models.BooleanField(default=False)
     class Meta:
         unique_together = ('employee', 'date')
 
@@ -47,12 +54,16 @@ class LeaveRequest(models.Model):
     days = models.DecimalField(max_digits=5, decimal_places=2)
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=PENDING)
     unpaid = models.BooleanField(default=False)  # mark if unpaid leave
+    class Meta:
+        indexes = [models.Index(fields=['employee', 'status', 'unpaid', 'start_date'], name='hr_leave_emp_status_start_idx')]
 
 class OvertimeRecord(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='overtimes')
     date = models.DateField()
     hours = models.DecimalField(max_digits=5, decimal_places=2)
     approved = models.BooleanField(default=False)
+    class Meta:
+        indexes = [models.Index(fields=['employee', 'date'], name='hr_overtime_emp_date_idx')]
 
 class Deduction(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='deductions')
@@ -60,12 +71,17 @@ class Deduction(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     reason = models.TextField(blank=True, null=True)
     date = models.DateField(default=timezone.now)
+    class Meta:
+        indexes = [models.Index(fields=['employee', 'date'], name='hr_deduction_emp_date_idx')]
 
 class PayrollPeriod(models.Model):
     year = models.PositiveIntegerField()
     month = models.PositiveIntegerField()  # 1-12
     processed_at = models.DateTimeField(null=True, blank=True)
     finalized = models.BooleanField(default=False)
+    # set once the finalized period is written to its compressed archive (see hr.archive)
+    archived_at = models.DateTimeField(null=True, blank=True)
+    archive_sha256 = models.CharField(max_length=64, blank=True)
     class Meta:
         unique_together = ('year','month')
 
@@ -75,7 +91,161 @@ class Payslip(models.Model):
     gross_pay = models.DecimalField(max_digits=12, decimal_places=2)
     total_deductions = models.DecimalField(max_digits=12, decimal_places=2)
     net_pay = models.DecimalField(max_digits=12, decimal_places=2)
-    details = models.JSONField(default=dict)  # breakdown: allowances, overtime, taxes, pf, leaves, deductions
+    # breakdown: allowances, overtime, taxes, pf, leaves, deductions
+    basic = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    hra = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    other_allowances = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    overtime_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    overtime_pay = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    pf = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    manual_deductions = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    unpaid_deduction = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    days_in_month = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    BREAKDOWN_FIELDS = ('basic', 'hra', 'other_allowances', 'overtime_hours', 'overtime_pay',
+                        'pf', 'tax', 'manual_deductions', 'unpaid_deduction', 'days_in_month')
+
     class Meta:
         unique_together = ('payroll_period','employee')
+
+    @property
+    def details(self):
+        # the breakdown in the old JSON shape: figures as strings, days_in_month as an int
+        return breakdown_details(getattr(self, name) for name in self.BREAKDOWN_FIELDS)
+
+
+# calculate_payslip stored these as a bare Decimal('0') when there was nothing to compute
+# (no overtime rows, no PF/tax percentage), so the old JSON said '0' rather than '0.00'
+_BARE_ZERO_FIELDS = ('overtime_hours', 'pf', 'tax')
+
+
+def breakdown_details(values):
+    """``Payslip.details`` from breakdown values given in ``Payslip.BREAKDOWN_FIELDS`` order."""
+    details = dict(zip(Payslip.BREAKDOWN_FIELDS, values))
+    for name, value in details.items():
+        if name in _BARE_ZERO_FIELDS and value is not None and Decimal(value) == 0:
+            details[name] = '0'
+        elif name != 'days_in_month':
+            details[name] = str(value)
+    return details
+
+class PayrollDirtyEmployee(models.Model):
+    # (employee, year, month) whose payslip inputs changed since the last payroll run
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payroll_dirty_marks')
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    marked_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        unique_together = ('employee', 'year', 'month')
+
+class AttendanceSummary(models.Model):
+    # one row per employee per month, kept in step with Attendance (see hr.attendance)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='attendance_summaries')
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    present_days = models.PositiveIntegerField(default=0)  # full days worked
+    half_days = models.PositiveIntegerField(default=0)
+    holidays = models.PositiveIntegerField(default=0)
+    recorded_days = models.PositiveIntegerField(default=0)  # bit n-1 set when day n has an attendance row
+    worked_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        unique_together = ('employee', 'year', 'month')
+
+    def absences_before(self, day):
+        # weekdays of the month earlier than ``day`` with no attendance row
+        absent = 0
+        for n in range(1, monthrange(self.year, self.month)[1] + 1):
+            date = datetime.date(self.year, self.month, n)
+            if date >= day:
+                break
+            if date.weekday() < 5 and not self.recorded_days >> (n - 1) & 1:
+                absent += 1
+        return absent
+
+    @property
+    def absences(self):
+        # worked out on read, so it stays right as the month goes by without any attendance writes
+        return self.absences_before(timezone.localdate())
+
+class PayrollJob(models.Model):
+    # a queued payroll run, picked up by the payroll_worker command (see hr.jobs)
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+    payroll_period = models.ForeignKey(PayrollPeriod, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    finalize = models.BooleanField(default=False)
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # lease: a running job whose heartbeat is older than HR_PAYROLL_JOB_LEASE is requeued (see hr.jobs)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    timings = models.JSONField(default=dict, blank=True)  # phase timings of the run, for /api/metrics/
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'], name='hr_payrolljob_status_idx')]
+        constraints = [
+            # at most one queued/running job per period
+            models.UniqueConstraint(fields=['payroll_period'], condition=models.Q(status__in=['queued', 'running']),
+                                    name='hr_payrolljob_one_active_per_period'),
+        ]
+
+class PayrollRollup(models.Model):
+    # per department per payroll period totals, rebuilt after every payroll run (see hr.rollups)
+    payroll_period = models.ForeignKey(PayrollPeriod, on_delete=models.CASCADE, related_name='rollups')
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='payroll_rollups')  # null: employees without a department
+    department_name = models.CharField(max_length=100, blank=True)  # as it was when the period was run
+    headcount = models.PositiveIntegerField(default=0)
+    gross_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_deductions = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    net_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    overtime_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    overtime_pay = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pf = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    manual_deductions = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unpaid_deduction = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    AMOUNT_FIELDS = ('gross_pay', 'total_deductions', 'net_pay', 'overtime_hours', 'overtime_pay',
+                     'pf', 'tax', 'manual_deductions', 'unpaid_deduction')
+
+    class Meta:
+        unique_together = ('payroll_period', 'department')
+
+class ResourceVersion(models.Model):
+    # change counter per API resource, bumped on every write (see hr.versions); drives ETags and the response cache
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+class PunchEvent(models.Model):
+    # append-only terminal punches; hr.punches folds them into Attendance (never updated in place)
+    IN = 'in'
+    OUT = 'out'
+    DIRECTION_CHOICES = [(IN, 'In'), (OUT, 'Out')]
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='punch_events')
+    punched_at = models.DateTimeField()
+    direction = models.CharField(max_length=3, choices=DIRECTION_CHOICES, blank=True)  # blank: terminal does not say
+    terminal = models.CharField(max_length=50, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        indexes = [models.Index(fields=['employee', 'punched_at'], name='hr_punch_employee_time_idx')]
+
+class PunchCompaction(models.Model):
+    # watermark of hr.punches.compact_punches: events with id <= last_event_id are in Attendance
+    name = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.PositiveBigIntegerField(default=0)
+    events = models.PositiveBigIntegerField(default=0)  # folded so far
+    compacted_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,10 @@
+# Project/hr/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class HRCursorPagination(CursorPagination):
+    # keyset pagination on the primary key: constant cost per page however deep the client goes
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
@@ -0,0 +1,91 @@
+# Project/hr/parallel.py
+import math
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+SHARD_BY_CHOICES = ('id-range', 'department')
+# employee ids per pool task, so each task's pk IN (...) list stays well inside database parameter limits
+SHARD_TASK_SIZE = getattr(settings, 'HR_PAYROLL_SHARD_TASK_SIZE', 5000)
+
+
+def plan_shards(employees, workers: int, shard_by='id-range'):
+    """Split ``employees`` into at most ``workers`` shards, each a sorted list of primary keys.
+
+    The caller's queryset is evaluated here, once, so workers only ever filter on ``pk``.
+    ``id-range`` cuts the sorted primary keys into contiguous runs of equal size;
+    ``department`` packs whole departments (employees without one count as one more)
+    into the least loaded shard, largest first.
+    """
+    if shard_by not in SHARD_BY_CHOICES:
+        raise ValueError(f'Unknown shard_by {shard_by!r}; expected one of {SHARD_BY_CHOICES}')
+    rows = list(employees.order_by('pk').values_list('pk', 'department_id'))
+    if shard_by == 'id-range':
+        ids = [pk for pk, _ in rows]
+        if not ids:
+            return []
+        size = math.ceil(len(ids) / workers)
+        return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    by_department = defaultdict(list)
+    for pk, department_id in rows:
+        by_department[department_id].append(pk)
+    bins = [[0, []] for _ in range(workers)]
+    for ids in sorted(by_department.values(), key=len, reverse=True):
+        lightest = min(bins, key=lambda b: b[0])
+        lightest[0] += len(ids)
+        lightest[1].extend(ids)
+    return [sorted(ids) for _, ids in bins if ids]
+
+
+def _init_worker():
+    # with the 'spawn' start method the child starts from a bare interpreter
+    if not apps.ready:
+        django.setup()
+
+
+def _compute_shard(year, month, employee_ids, overtime_rate, daily_hours):
+    from .models import Employee
+    from .payroll import compute_payroll
+    try:
+        employees = Employee.objects.filter(pk__in=employee_ids)
+        timings = {}
+        calcs = compute_payroll(year, month, employees, overtime_rate=overtime_rate, daily_hours=daily_hours,
+                                timings=timings)
+        return calcs, timings
+    finally:
+        connections.close_all()
+
+
+def compute_payroll_sharded(year: int, month: int, employees, workers: int, shard_by='id-range',
+                            overtime_rate=Decimal('1.5'), daily_hours=Decimal('8'), timings=None, progress=None):
+    """Compute a period in a process pool; returns merged ``(employee, calc)`` pairs.
+
+    Each shard is sent as tasks of at most ``SHARD_TASK_SIZE`` primary keys. Workers
+    open their own database connections, so this needs a database the child processes
+    can reach (not an in-memory SQLite test database). ``timings`` receives the slowest
+    task's fetch and compute seconds (the phases run in parallel); ``progress(done, total)``
+    is called as each task finishes, counting employees.
+    """
+    shards = plan_shards(employees, workers, shard_by)
+    total = sum(len(shard) for shard in shards)
+    # never let children inherit the parent's open connections
+    connections.close_all()
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards) or 1), initializer=_init_worker) as pool:
+        futures = [pool.submit(_compute_shard, year, month, shard[i:i + SHARD_TASK_SIZE], overtime_rate, daily_hours)
+                   for shard in shards for i in range(0, len(shard), SHARD_TASK_SIZE)]
+        for future in as_completed(futures):
+            calcs, shard_timings = future.result()
+            results.extend(calcs)
+            if progress is not None:
+                progress(len(results), total)
+            if timings is not None:
+                for phase, seconds in shard_timings.items():
+                    timings[phase] = max(timings.get(phase, 0.0), seconds)
+    return results
@@ -1,13 +1,117 @@
+import datetime
+import logging
+import time
 from decimal import Decimal, ROUND_HALF_UP
 from calendar import monthrange
-from django.db import transaction
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q, Sum
 from django.utils import timezone
 from .models import Employee, PayrollPeriod, Payslip, OvertimeRecord, Deduction, LeaveRequest, Attendance
+from .versions import PAYSLIP, bump_versions
+
+logger = logging.getLogger('hr.payroll')
+
+# rows per INSERT/UPDATE statement when persisting payslips
+PAYSLIP_BATCH_SIZE = getattr(settings, 'HR_PAYSLIP_BATCH_SIZE', 1000)
+PAYSLIP_UPDATE_FIELDS = ['gross_pay', 'total_deductions', 'net_pay', *Payslip.BREAKDOWN_FIELDS]
+# take salary fields from the pay-profile cache (hr.profiles) instead of the database; only
+# worth it with a shared HR_PAY_PROFILE_CACHE, and writers that bypass signals must bump it
+USE_PAY_PROFILE_CACHE = getattr(settings, 'HR_USE_PAY_PROFILE_CACHE', bool(getattr(settings, 'HR_PAY_PROFILE_CACHE', None)))
+# compute through the integer-cents calculator in hr.vectorized (needs numpy)
+USE_VECTORIZED = getattr(settings, 'HR_PAYROLL_VECTORIZED', False)
+# employees computed between progress callbacks
+PROGRESS_EVERY = getattr(settings, 'HR_PAYROLL_PROGRESS_EVERY', 500)
+
+class PeriodArchived(Exception):
+    """The payroll period has been archived (see hr.archive) and can no longer be regenerated."""
+
+    def __init__(self, year, month):
+        super().__init__(f'Payroll period {year}-{month:02d} is archived and cannot be regenerated.')
 
 def _quant(x):
     return Decimal(x).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
-def generate_payslip_for_employee(employee: Employee, year: int, month: int, overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+def month_bounds(year: int, month: int):
+    """Half-open [first day, first day of next month) for a payroll month."""
+    start = datetime.date(year, month, 1)
+    end = start + datetime.timedelta(days=monthrange(year, month)[1])
+    return start, end
+
+def _sum_by_employee(qs, field):
+    # one grouped aggregate query -> {employee_id: Decimal total}
+    # all summed fields have 2 decimal places; SQLite returns sums as floats, so
+    # quantize back to match a Python sum() over the model values exactly.
+    return {row['employee_id']: _quant(row['total']) for row in _grouped_sum(qs, field)}
+
+def _grouped_sum(qs, field):
+    return qs.order_by().values('employee_id').annotate(total=Sum(field))
+
+def leave_overlap_days(start_date, end_date, days, month_start, month_end):
+    """The share of a leave's ``days`` that falls inside [month_start, month_end).
+
+    A leave entirely inside the month keeps its recorded ``days``; one that crosses a
+    month boundary is prorated by the calendar days that overlap the month. The running
+    total is rounded rather than each share, so the last month takes the remainder and
+    the shares of one leave always add up to ``days``.
+    """
+    first = max(start_date, month_start)
+    last = min(end_date, month_end - datetime.timedelta(days=1))
+    if last < first:
+        return Decimal('0')
+    span = (end_date - start_date).days + 1
+    days = Decimal(days)
+    before = _quant(days * (first - start_date).days / span)
+    through = _quant(days * ((last - start_date).days + 1) / span)
+    return through - before
+
+def _unpaid_days_by_employee(qs, month_start, month_end):
+    # one range query for the whole workforce; each leave is clipped to the month here
+    totals = {}
+    for employee_id, start_date, end_date, days in qs.values_list('employee_id', 'start_date', 'end_date', 'days'):
+        share = leave_overlap_days(start_date, end_date, days, month_start, month_end)
+        totals[employee_id] = totals.get(employee_id, Decimal('0')) + share
+    return {employee_id: _quant(total) for employee_id, total in totals.items()}
+
+def period_input_querysets(year: int, month: int, employees):
+    """The per-input querysets read by ``fetch_period_inputs``, as ``{name: (queryset, field)}``.
+
+    ``field`` is the column summed in SQL; unpaid leave has ``None`` because its rows
+    are clipped to the month in Python instead. They read from the same database as ``employees``.
+    """
+    employee_ids = employees.order_by().values('pk')
+    db = employees.db
+    # plain range predicates (not date__year/date__month, which wrap the column in a
+    # function) so the (employee, date) style indexes can be used
+    start, end = month_bounds(year, month)
+    return {
+        'overtime_hours': (
+            OvertimeRecord.objects.using(db).filter(employee__in=employee_ids, date__gte=start, date__lt=end, approved=True),
+            'hours'),
+        # every approved unpaid leave overlapping the month, wherever it starts
+        'unpaid_days': (
+            LeaveRequest.objects.using(db).filter(employee__in=employee_ids, status=LeaveRequest.APPROVED, unpaid=True,
+                                        start_date__lt=end, end_date__gte=start),
+            None),
+        'manual_deductions': (
+            Deduction.objects.using(db).filter(employee__in=employee_ids, date__gte=start, date__lt=end),
+            'amount'),
+    }
+
+def fetch_period_inputs(year: int, month: int, employees):
+    """Per-employee overtime, unpaid leave and manual deduction totals for a period.
+
+    ``employees`` is an Employee queryset; it is used as a subquery so the number
+    of queries does not depend on how many employees it matches.
+    """
+    start, end = month_bounds(year, month)
+    return {
+        name: _sum_by_employee(qs, field) if field else _unpaid_days_by_employee(qs, start, end)
+        for name, (qs, field) in period_input_querysets(year, month, employees).items()
+    }
+
+def calculate_payslip(employee, year: int, month: int, total_ot_hours=Decimal('0'), unpaid_days=Decimal('0'),
+                      manual_total=Decimal('0'), overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
     # base_salary_components
     basic = Decimal(employee.monthly_basic)
     hra = Decimal(employee.hra)
@@ -18,21 +122,14 @@ def generate_payslip_for_employee(employee: Employee, year: int, month: int, ove
     days_in_month = monthrange(year, month)[1]
 
     # overtime
-    ots = OvertimeRecord.objects.filter(employee=employee, date__year=year, date__month=month, approved=True)
-    total_ot_hours = sum([o.hours for o in ots]) if ots else Decimal('0')
     # per-hour basic rate = basic / (working_days * daily_hours). For simplicity use calendar days.
     per_hour_rate = (basic / Decimal(days_in_month)) / daily_hours
     overtime_pay = _quant(Decimal(total_ot_hours) * per_hour_rate * Decimal(overtime_rate))
 
     # unpaid_leaves
-    unpaid_leaves = LeaveRequest.objects.filter(employee=employee, status=LeaveRequest.APPROVED, unpaid=True,
-                                                start_date__year=year, start_date__month=month)
-    unpaid_days = sum([lr.days for lr in unpaid_leaves]) if unpaid_leaves else Decimal('0')
     unpaid_deduction = _quant((gross / Decimal(days_in_month)) * Decimal(unpaid_days))
 
     # fixed/variable manual deductions in this month
-    manual_deds = Deduction.objects.filter(employee=employee, date__year=year, date__month=month)
-    manual_total = sum([d.amount for d in manual_deds]) if manual_deds else Decimal('0')
     manual_total = _quant(manual_total)
 
     # statutory
@@ -63,26 +160,214 @@ def generate_payslip_for_employee(employee: Employee, year: int, month: int, ove
         'details': details
     }
 
-@transaction.atomic
-def generate_payroll_for_period(year: int, month: int, finalize=False):
-    period, created = PayrollPeriod.objects.get_or_create(year=year, month=month)
-    employees = Employee.objects.filter(is_active=True)
+def _calculate_payslips(employees, year: int, month: int, overtime_hours, unpaid_days, manual_deductions,
+                        overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+    # the Decimal reference path; hr.vectorized.calculate_payslips has the same signature
+    zero = Decimal('0')
+    return [
+        calculate_payslip(
+            emp, year, month,
+            total_ot_hours=overtime_hours.get(emp.pk, zero),
+            unpaid_days=unpaid_days.get(emp.pk, zero),
+            manual_total=manual_deductions.get(emp.pk, zero),
+            overtime_rate=overtime_rate,
+            daily_hours=daily_hours,
+        )
+        for emp in employees
+    ]
+
+def payslip_calculator():
+    """The batch calculator used by ``compute_payroll``: ``hr.vectorized`` when enabled and numpy is installed."""
+    if USE_VECTORIZED:
+        from . import vectorized
+        if vectorized.available():
+            return vectorized.calculate_payslips
+    return _calculate_payslips
+
+def compute_payroll(year: int, month: int, employees=None, overtime_rate=Decimal('1.5'), daily_hours=Decimal('8'),
+                    timings=None, progress=None):
+    """Compute payslips for every employee in ``employees`` (default: all active) in memory.
+
+    Returns a list of ``(employee, calc)`` pairs, where ``employee`` is a ``PayProfile``
+    read with one narrow query (or from the cache with ``HR_USE_PAY_PROFILE_CACHE``). Runs a fixed number of queries
+    (the employee fetch plus one grouped aggregate per input) regardless of headcount.
+    If a ``timings`` dict is given, seconds spent in the ``fetch`` and ``compute``
+    phases are added to it. ``progress(done, total)`` is called every
+    ``PROGRESS_EVERY`` employees and once at the end.
+    """
+    started = time.perf_counter()
+    if employees is None:
+        employees = Employee.objects.filter(is_active=True)
+    inputs = fetch_period_inputs(year, month, employees)
+    from .profiles import load_pay_profiles, pay_profiles_for
+    if USE_PAY_PROFILE_CACHE:
+        # only ids come from the database; salary fields come from the profile cache
+        employees = pay_profiles_for(employees.order_by('pk').values_list('pk', flat=True))
+    else:
+        employees = load_pay_profiles(employees)
+    fetched = time.perf_counter()
+    overtime_hours = inputs['overtime_hours']
+    unpaid_days = inputs['unpaid_days']
+    manual_deductions = inputs['manual_deductions']
+    calculate = payslip_calculator()
     results = []
-    for emp in employees:
-        calc = generate_payslip_for_employee(emp, year, month)
-        payslip, created = Payslip.objects.update_or_create(
+    total = len(employees)
+    for offset in range(0, total, PROGRESS_EVERY):
+        chunk = employees[offset:offset + PROGRESS_EVERY]
+        calcs = calculate(chunk, year, month, overtime_hours, unpaid_days, manual_deductions,
+                          overtime_rate=overtime_rate, daily_hours=daily_hours)
+        results.extend(zip(chunk, calcs))
+        done = offset + len(chunk)
+        if progress is not None and done % PROGRESS_EVERY == 0:
+            progress(done, total)
+    if progress is not None:
+        progress(total, total)
+    if timings is not None:
+        timings['fetch'] = timings.get('fetch', 0.0) + (fetched - started)
+        timings['compute'] = timings.get('compute', 0.0) + (time.perf_counter() - fetched)
+    return results
+
+def generate_payslip_for_employee(employee: Employee, year: int, month: int, overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+    inputs = fetch_period_inputs(year, month, Employee.objects.filter(pk=employee.pk))
+    zero = Decimal('0')
+    return calculate_payslip(
+        employee, year, month,
+        total_ot_hours=inputs['overtime_hours'].get(employee.pk, zero),
+        unpaid_days=inputs['unpaid_days'].get(employee.pk, zero),
+        manual_total=inputs['manual_deductions'].get(employee.pk, zero),
+        overtime_rate=overtime_rate,
+        daily_hours=daily_hours,
+    )
+
+def payslip_breakdown(calc):
+    """The typed ``Payslip`` breakdown columns for a ``calculate_payslip`` result."""
+    details = calc['details']
+    return {
+        name: details[name] if name == 'days_in_month' else Decimal(details[name])
+        for name in Payslip.BREAKDOWN_FIELDS
+    }
+
+def bulk_upsert_payslips(period: PayrollPeriod, calcs, batch_size=None):
+    """Insert or update the payslips for ``period`` from ``(employee, calc)`` pairs.
+
+    Relies on the ``('payroll_period', 'employee')`` unique constraint: backends that
+    support ``ON CONFLICT``/``ON DUPLICATE KEY`` get a single upsert per batch, the
+    rest fall back to chunked ``bulk_create`` + ``bulk_update``.
+    Returns ``(payslips, created_count, updated_count)``.
+    """
+    batch_size = batch_size or PAYSLIP_BATCH_SIZE
+    existing = dict(Payslip.objects.filter(payroll_period=period).values_list('employee_id', 'id'))
+    payslips = [
+        Payslip(
             payroll_period=period,
-            employee=emp,
-            defaults={
-                'gross_pay': calc['gross'],
-                'total_deductions': calc['total_deductions'],
-                'net_pay': calc['net_pay'],
-                'details': calc['details']
-            }
+            employee_id=emp.pk,
+            gross_pay=calc['gross'],
+            total_deductions=calc['total_deductions'],
+            net_pay=calc['net_pay'],
+            **payslip_breakdown(calc),
         )
-        results.append(payslip)
+        for emp, calc in calcs
+    ]
+    to_update = [p for p in payslips if p.employee_id in existing]
+    to_create = [p for p in payslips if p.employee_id not in existing]
+
+    features = connections[Payslip.objects.db].features
+    if features.supports_update_conflicts:
+        kwargs = {}
+        if features.supports_update_conflicts_with_target:
+            kwargs['unique_fields'] = ['payroll_period', 'employee']
+        Payslip.objects.bulk_create(payslips, batch_size=batch_size, update_conflicts=True,
+                                    update_fields=PAYSLIP_UPDATE_FIELDS, **kwargs)
+    else:
+        Payslip.objects.bulk_create(to_create, batch_size=batch_size)
+        for p in to_update:
+            p.pk = existing[p.employee_id]
+        Payslip.objects.bulk_update(to_update, PAYSLIP_UPDATE_FIELDS, batch_size=batch_size)
+
+    if any(p.pk is None for p in payslips):
+        # backend could not return ids from the upsert; fetch them in one go
+        ids = dict(Payslip.objects.filter(payroll_period=period).values_list('employee_id', 'id'))
+        for p in payslips:
+            p.pk = ids.get(p.employee_id)
+    bump_versions(PAYSLIP)
+    return payslips, len(to_create), len(to_update)
+
+def run_payroll(year: int, month: int, finalize=False, batch_size=None, workers=1, shard_by='id-range',
+                incremental=False, progress=None):
+    """Compute and persist a period's payroll; returns the payslips and created/updated/removed counts.
+
+    With ``workers > 1`` the computation is sharded across a process pool
+    (see ``hr.parallel``); the write still happens here, in a single transaction.
+    With ``incremental=True`` only employees marked dirty for the period (see
+    ``hr.tracking``) or still missing a payslip are recomputed. Marked employees who
+    are no longer active lose their payslip for the period (counted in ``removed``).
+    ``progress(done, total)`` reports computed employees (see ``compute_payroll``).
+    Raises ``PeriodArchived`` for an archived period; finalizing archives it when
+    ``HR_ARCHIVE_ON_FINALIZE`` is on.
+    """
+    from .metrics import registry
+    from .rollups import refresh_payroll_rollups
+    from .tracking import clear_dirty, dirty_marks
+    started = timezone.now()
+    run_started = time.perf_counter()
+    timings = {'fetch': 0.0, 'compute': 0.0, 'persist': 0.0}
+    if PayrollPeriod.objects.filter(year=year, month=month, archived_at__isnull=False).exists():
+        raise PeriodArchived(year, month)
+    employees = Employee.objects.filter(is_active=True)
+    if incremental:
+        has_payslip = Payslip.objects.filter(payroll_period__year=year, payroll_period__month=month)
+        employees = employees.filter(
+            Q(pk__in=dirty_marks(year, month).values('employee_id')) | ~Q(pk__in=has_payslip.values('employee_id')))
+
+    # compute first so the write lock is only held for the bulk writes below
+    if workers and workers > 1:
+        from .parallel import compute_payroll_sharded
+        calcs = compute_payroll_sharded(year, month, employees, workers, shard_by=shard_by, timings=timings,
+                                        progress=progress)
+    else:
+        calcs = compute_payroll(year, month, employees, timings=timings, progress=progress)
+    persist_started = time.perf_counter()
+    with transaction.atomic():
+        period, _ = PayrollPeriod.objects.get_or_create(year=year, month=month)
+        payslips, created, updated = bulk_upsert_payslips(period, calcs, batch_size=batch_size)
+        # marks set after ``started`` belong to changes this run may not have seen
+        seen = dirty_marks(year, month).filter(marked_at__lte=started).values('employee_id')
+        # a marked employee outside the run set was deactivated: drop the payslip an earlier run left
+        removed, _ = Payslip.objects.filter(payroll_period=period, employee_id__in=seen,
+                                            employee__is_active=False).delete()
+        if removed:
+            bump_versions(PAYSLIP)
+        clear_dirty(year, month, started)
+        if finalize:
+            period.finalized = True
+            period.processed_at = timezone.now()
+            period.save()
+        refresh_payroll_rollups(period)
+    timings['persist'] = time.perf_counter() - persist_started
+    timings['total'] = time.perf_counter() - run_started
+    employees_per_second = len(calcs) / timings['total'] if timings['total'] else None
+
+    for phase, seconds in timings.items():
+        registry.observe(f'payroll {phase}_ms', seconds * 1000)
+    if employees_per_second is not None:
+        registry.observe('payroll employees_per_second', employees_per_second)
     if finalize:
-        period.finalized = True
-        period.processed_at = timezone.now()
-        period.save()
-    return results
+        from . import archive
+        if archive.ARCHIVE_ON_FINALIZE:
+            # the payroll itself is committed; a failed archive can be retried with archive_payroll_period
+            try:
+                archive.archive_period(period)
+            except Exception:
+                logger.exception('Archiving payroll period %s-%02d failed', year, month)
+    return {
+        'period': period,
+        'payslips': payslips,
+        'created': created,
+        'updated': updated,
+        'removed': removed,
+        'timings': timings,
+        'employees_per_second': employees_per_second,
+    }
+
+def generate_payroll_for_period(year: int, month: int, finalize=False, batch_size=None, incremental=False):
+    return run_payroll(year, month, finalize=finalize, batch_size=batch_size, incremental=incremental)['payslips']
@@ -0,0 +1,278 @@
+# Project/hr/pdf.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import get_context
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+
+try:
+    from weasyprint import HTML
+except Exception:
+    HTML = None
+
+try:
+    from weasyprint.text.fonts import FontConfiguration
+except Exception:
+    FontConfiguration = None
+
+logger = logging.getLogger('hr.pdf')
+
+PAYSLIP_TEMPLATE = 'hr/payslip_template.html'
+PDF_WORKERS = getattr(settings, 'HR_PDF_WORKERS', None) or os.cpu_count() or 1
+# bundles with fewer payslips than this are rendered in the calling process: not worth a pool round trip
+PDF_POOL_MIN_PAYSLIPS = getattr(settings, 'HR_PDF_POOL_MIN_PAYSLIPS', 20)
+PDF_CACHE_DIR = Path(getattr(settings, 'HR_PDF_CACHE_DIR', Path(settings.BASE_DIR) / 'var' / 'pdf_cache'))
+PDF_CACHE_MAX_BYTES = getattr(settings, 'HR_PDF_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+# walking the cache directory is not free, so only check the size limit every N writes
+PDF_CACHE_EVICT_EVERY = getattr(settings, 'HR_PDF_CACHE_EVICT_EVERY', 50)
+
+# per-process renderer state, set up once by _init_renderer()
+_font_config = None
+_warm = False
+
+
+def _init_renderer():
+    # the first write_pdf() pays for font discovery and the default stylesheet;
+    # do it once per process so every later payslip reuses the warmed state
+    global _font_config, _warm
+    if _warm or HTML is None:
+        return
+    _font_config = FontConfiguration() if FontConfiguration is not None else None
+    HTML(string='<!doctype html><p></p>').write_pdf(font_config=_font_config)
+    _warm = True
+
+
+def render_pdf(html_string):
+    _init_renderer()
+    return HTML(string=html_string).write_pdf(font_config=_font_config)
+
+
+def render_payslip_html(payslip):
+    return render_to_string(PAYSLIP_TEMPLATE, {'p': payslip})
+
+
+@lru_cache(maxsize=None)
+def template_version():
+    source = get_template(PAYSLIP_TEMPLATE).template.source
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+def payslip_cache_key(payslip):
+    """Hash of everything the template prints, so a regenerated or edited payslip gets a new key."""
+    employee = payslip.employee
+    period = payslip.payroll_period
+    payload = {
+        'employee': [employee.employee_code, employee.first_name, employee.last_name],
+        'period': [period.year, period.month],
+        'gross_pay': str(payslip.gross_pay),
+        'total_deductions': str(payslip.total_deductions),
+        'net_pay': str(payslip.net_pay),
+        'details': payslip.details,
+        'template': template_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _cache_path(key):
+    return PDF_CACHE_DIR / key[:2] / f'{key}.pdf'
+
+
+def cached_pdf_mtime(key):
+    try:
+        return _cache_path(key).stat().st_mtime
+    except OSError:
+        return None
+
+
+def read_cached_pdf(key):
+    path = _cache_path(key)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    # atime is the LRU clock; mtime stays the render time (used for Last-Modified)
+    try:
+        os.utime(path, (time.time(), path.stat().st_mtime))
+    except OSError:
+        pass
+    return data
+
+
+_writes_since_evict = 0
+
+
+def store_cached_pdf(key, data):
+    """Best effort: a cache that cannot be written is logged, never raised; returns whether it was stored."""
+    global _writes_since_evict
+    path = _cache_path(key)
+    tmp = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning('Could not cache payslip PDF %s', path, exc_info=True)
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return False
+    _writes_since_evict += 1
+    if _writes_since_evict >= PDF_CACHE_EVICT_EVERY:
+        _writes_since_evict = 0
+        evict_pdf_cache()
+    return True
+
+
+def evict_pdf_cache(max_bytes=None):
+    """Delete least recently used PDFs until the cache fits in ``max_bytes``; returns files removed."""
+    max_bytes = PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for path in PDF_CACHE_DIR.glob('*/*.pdf'):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_atime, st.st_size, path))
+        total += st.st_size
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def payslip_pdf_bytes(payslip, key=None):
+    """PDF for one payslip, served from the disk cache when its content hash is already rendered."""
+    key = key or payslip_cache_key(payslip)
+    data = read_cached_pdf(key)
+    if data is None:
+        data = render_pdf(render_payslip_html(payslip))
+        store_cached_pdf(key, data)
+    return data
+
+
+def bundle_filename(payslip):
+    period = payslip.payroll_period
+    return f'payslip_{payslip.employee.employee_code}_{period.year}_{period.month:02d}.pdf'
+
+
+# renderer pools by size, started on first use and kept for the life of the process
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def render_pool(workers):
+    """The process pool of ``workers`` renderers shared by every bundle rendered in this process.
+
+    Started once, so requests do not pay for process start-up and Django setup in each child.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn: workers never touch the database, so they should not inherit its connections
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                                         initializer=_init_renderer)
+        return pool
+
+
+def _discard_pool(workers, pool):
+    # a worker died; the next bundle starts a fresh pool
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_payslip_pdfs(payslips, workers=None):
+    """Yield ``(filename, pdf_bytes)`` for each payslip, rendering in the shared process pool.
+
+    Templates are rendered here (they need the ORM); workers only run WeasyPrint.
+    At most a few documents per worker are in flight, so memory stays bounded.
+    """
+    workers = workers or PDF_WORKERS
+    if workers <= 1:
+        for p in payslips:
+            yield bundle_filename(p), payslip_pdf_bytes(p)
+        return
+
+    pool = render_pool(workers)
+    pending = deque()
+
+    def finish(name, key, result):
+        if isinstance(result, bytes):
+            return name, result
+        try:
+            data = result.result()
+        except BrokenProcessPool:
+            _discard_pool(workers, pool)
+            raise
+        store_cached_pdf(key, data)
+        return name, data
+
+    try:
+        for p in payslips:
+            key = payslip_cache_key(p)
+            result = read_cached_pdf(key)
+            if result is None:
+                result = pool.submit(render_pdf, render_payslip_html(p))
+            pending.append((bundle_filename(p), key, result))
+            if len(pending) >= workers * 4:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        # the pool outlives this bundle: only drop what is still queued for it (client went away)
+        for _, _, result in pending:
+            if not isinstance(result, bytes):
+                result.cancel()
+
+
+class _ZipBuffer:
+    # unseekable sink for ZipFile; drained after every entry so nothing accumulates
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries):
+    """Yield the bytes of a ZIP archive built from ``(name, data)`` pairs as they arrive."""
+    buf = _ZipBuffer()
+    with zipfile.ZipFile(buf, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            yield buf.drain()
+    yield buf.drain()
@@ -0,0 +1,99 @@
+# Project/hr/profiles.py
+# Versioned cache of the Employee fields payroll needs ("pay profiles").
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Employee
+from .versions import EMPLOYEE, bump_versions, get_versions
+
+PAY_PROFILE_FIELDS = ('id', 'department_id', 'is_active', 'monthly_basic', 'hra', 'other_allowances',
+                      'pf_percent', 'tax_percent')
+# optional Django cache alias shared between processes; None keeps the cache in-process only
+PAY_PROFILE_CACHE = getattr(settings, 'HR_PAY_PROFILE_CACHE', None)
+# keyed by the EMPLOYEE ResourceVersion, which only ever increases, so an evicted
+# entry can never be mistaken for a newer one
+_DATA_KEY = 'hr:pay_profiles:{}'
+
+
+class PayProfile(namedtuple('PayProfile', PAY_PROFILE_FIELDS)):
+    """Read-only stand-in for an Employee in payroll calculations (same attribute names)."""
+    __slots__ = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+
+_lock = threading.Lock()
+_local = {'loaded_version': None, 'profiles': None}
+
+
+def _shared_cache():
+    return caches[PAY_PROFILE_CACHE] if PAY_PROFILE_CACHE else None
+
+
+def current_version():
+    """The database-backed EMPLOYEE change counter (see hr.versions), shared by every process."""
+    return get_versions([EMPLOYEE])[EMPLOYEE][0]
+
+
+def load_pay_profiles(employees):
+    """Pay profiles for an Employee queryset, in pk order, read straight from the database."""
+    return [PayProfile(*row) for row in employees.order_by('pk').values_list(*PAY_PROFILE_FIELDS)]
+
+
+def invalidate_pay_profiles():
+    """Make every process reload once the current transaction commits.
+
+    Employee save/delete signals bump the EMPLOYEE version already; code that bypasses
+    signals (``bulk_create``, ``QuerySet.update``) must call this (or ``bump_versions``).
+    """
+    with _lock:
+        _local['profiles'] = None
+        _local['loaded_version'] = None
+    bump_versions(EMPLOYEE)
+
+
+def warm_pay_profiles():
+    """Load every employee's pay profile with a single narrow query and cache it."""
+    version = current_version()
+    profiles = {row[0]: PayProfile(*row) for row in Employee.objects.order_by().values_list(*PAY_PROFILE_FIELDS)}
+    with _lock:
+        _local['profiles'] = profiles
+        _local['loaded_version'] = version
+    cache = _shared_cache()
+    if cache is not None:
+        cache.set(_DATA_KEY.format(version), profiles, timeout=None)
+    return profiles
+
+
+def get_pay_profiles():
+    """``{employee_id: PayProfile}`` for all employees, from cache when the version still matches."""
+    version = current_version()
+    with _lock:
+        if _local['loaded_version'] == version and _local['profiles'] is not None:
+            return _local['profiles']
+    cache = _shared_cache()
+    if cache is not None:
+        profiles = cache.get(_DATA_KEY.format(version))
+        if profiles is not None:
+            with _lock:
+                _local['profiles'] = profiles
+                _local['loaded_version'] = version
+            return profiles
+    return warm_pay_profiles()
+
+
+def pay_profiles_for(employee_ids):
+    """Pay profiles for the given ids, in the given order; ids missing from the cache are read from the database."""
+    employee_ids = list(employee_ids)
+    profiles = get_pay_profiles()
+    missing = [i for i in employee_ids if i not in profiles]
+    if missing:
+        # employees created without signals (bulk_create) since the last load
+        invalidate_pay_profiles()
+        profiles = {**profiles, **{p.id: p for p in load_pay_profiles(Employee.objects.filter(pk__in=missing))}}
+    return [profiles[i] for i in employee_ids if i in profiles]
@@ -0,0 +1,239 @@
+# Project/hr/punches.py
+# Append-only punch events (PunchEvent) and their compaction into Attendance.
+#
+# Terminals only ever INSERT punches, so shift change causes no row contention on Attendance.
+# compact_punches() later rebuilds the (employee, day) Attendance rows the new events touch:
+# first in, last out, full_day when the worked hours reach HR_FULL_DAY_HOURS. Days whose
+# Attendance row was entered by HR (from_punches=False) are left alone.
+#
+# Night shifts: an ``out`` punch counts towards the previous day when it closes an ``in``
+# from that day no more than HR_PUNCH_MAX_SHIFT_HOURS earlier. Undirected punches always
+# count towards their own local date, so an undirected shift across midnight still splits.
+import datetime
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .attendance import worked_hours
+from .importers import IMPORT_MAX_ERRORS, upsert_attendance
+from .models import Attendance, Employee, PunchCompaction, PunchEvent
+
+PUNCH_BATCH_SIZE = getattr(settings, 'HR_PUNCH_BATCH_SIZE', 5000)
+FULL_DAY_HOURS = Decimal(str(getattr(settings, 'HR_FULL_DAY_HOURS', 8)))
+# seconds an event must have been stored before it is compacted: ids are handed out before
+# commit, so a slow insert could otherwise land below a watermark that already moved past it
+COMPACTION_LAG = getattr(settings, 'HR_PUNCH_COMPACTION_LAG', 30)
+# longest in -> out span that is paired across midnight
+MAX_SHIFT = datetime.timedelta(hours=getattr(settings, 'HR_PUNCH_MAX_SHIFT_HOURS', 16))
+WATERMARK = 'attendance'
+
+
+def _build_punch(row, employee_ids):
+    """Turn one input row into an unsaved PunchEvent, or return a DRF-style error dict."""
+    if '_error' in row:
+        return None, {'non_field_errors': [row['_error']]}
+    errors = {}
+    code = str(row.get('employee_code') or '').strip()
+    employee_id = employee_ids.get(code)
+    if not code:
+        errors['employee_code'] = ['This field is required.']
+    elif employee_id is None:
+        errors['employee_code'] = [f'Unknown employee_code {code!r}.']
+
+    punched_at = None
+    try:
+        punched_at = parse_datetime(str(row.get('punched_at') or ''))
+    except ValueError:
+        pass
+    if punched_at is None:
+        errors['punched_at'] = ['Datetime has wrong format. Use YYYY-MM-DDThh:mm[:ss][+HH:MM].']
+    elif timezone.is_naive(punched_at):
+        punched_at = timezone.make_aware(punched_at)
+
+    direction = str(row.get('direction') or '').strip().lower()
+    if direction not in (PunchEvent.IN, PunchEvent.OUT, ''):
+        errors['direction'] = ['Must be "in", "out" or empty.']
+
+    if errors:
+        return None, errors
+    return PunchEvent(employee_id=employee_id, punched_at=punched_at, direction=direction,
+                      terminal=str(row.get('terminal') or '')[:50]), None
+
+
+def import_punches(rows, batch_size=None):
+    """Validate and insert an iterable of punch dicts; nothing existing is read or updated.
+
+    Rows need ``employee_code`` and ``punched_at`` (ISO 8601, naive values are taken in
+    the current time zone); ``direction`` (``in``/``out``) and ``terminal`` are optional.
+    Returns a report shaped like ``import_attendance``'s.
+    """
+    batch_size = batch_size or PUNCH_BATCH_SIZE
+    started = time.monotonic()
+    employee_ids = dict(Employee.objects.values_list('employee_code', 'id'))
+    received = imported = failed = 0
+    errors = []
+    batch = []
+
+    for row_number, row in enumerate(rows, start=1):
+        received += 1
+        punch, row_errors = _build_punch(row, employee_ids)
+        if row_errors:
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({'row': row_number, 'errors': row_errors})
+            continue
+        batch.append(punch)
+        if len(batch) >= batch_size:
+            PunchEvent.objects.bulk_create(batch)
+            imported += len(batch)
+            batch = []
+    if batch:
+        PunchEvent.objects.bulk_create(batch)
+        imported += len(batch)
+
+    seconds = time.monotonic() - started
+    return {
+        'received': received,
+        'imported': imported,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors),
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(received / seconds, 1) if seconds else None,
+    }
+
+
+def fold_punches(punches):
+    """``(check_in, check_out, full_day)`` for one employee-day from ``(local datetime, direction)`` pairs.
+
+    Undirected punches count as either: the first one is the check-in, the last one the
+    check-out. A day without a later out punch has no check_out and is not a full day.
+    """
+    ins = [at for at, direction in punches if direction != PunchEvent.OUT]
+    outs = [at for at, direction in punches if direction != PunchEvent.IN]
+    first_in = min(ins) if ins else None
+    last_out = max(outs) if outs else None
+    if first_in is not None and last_out is not None and last_out <= first_in:
+        last_out = None
+    check_in = first_in.time() if first_in else None
+    check_out = last_out.time() if last_out else None
+    full_day = bool(check_in and check_out) and worked_hours(check_in, check_out) >= FULL_DAY_HOURS
+    return check_in, check_out, full_day
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def shift_days(punches):
+    """``(work day, local datetime, direction)`` for one employee's punches in time order.
+
+    A punch belongs to its local date, except an ``out`` that closes the previous day's
+    still open ``in`` within ``MAX_SHIFT``: that one belongs to the previous day.
+    """
+    open_in = None
+    for at, direction in punches:
+        day = at.date()
+        if direction == PunchEvent.OUT:
+            if open_in is not None and open_in.date() == day - datetime.timedelta(days=1) and at - open_in <= MAX_SHIFT:
+                day = open_in.date()
+            open_in = None
+        elif direction == PunchEvent.IN:
+            open_in = at
+        else:
+            open_in = None
+        yield day, at, direction
+
+
+def rebuild_attendance_days(keys):
+    """Recompute the punch-built Attendance rows for ``{(employee_id, date)}`` from all of their punches.
+
+    The neighbouring days are rebuilt as well, since a punch after midnight can move to
+    the previous day's shift. Rows entered by HR are skipped; a punch-built row left with
+    no punches (they moved to the day before) is deleted.
+    """
+    days = {(employee_id, day + datetime.timedelta(days=n)) for employee_id, day in keys for n in (-1, 0, 1)}
+    if not days:
+        return 0
+    employee_ids = {employee_id for employee_id, _ in days}
+    dates = {day for _, day in days}
+    # one more day on each side: the day before decides whether an early out moves back
+    events = PunchEvent.objects.filter(
+        employee_id__in=employee_ids,
+        punched_at__gte=_local_midnight(min(dates) - datetime.timedelta(days=1)),
+        punched_at__lt=_local_midnight(max(dates) + datetime.timedelta(days=2)),
+    ).order_by('employee_id', 'punched_at').values_list('employee_id', 'punched_at', 'direction')
+    by_employee = defaultdict(list)
+    for employee_id, punched_at, direction in events.iterator(chunk_size=PUNCH_BATCH_SIZE):
+        by_employee[employee_id].append((timezone.localtime(punched_at), direction))
+    punches = defaultdict(list)
+    for employee_id, employee_punches in by_employee.items():
+        for day, at, direction in shift_days(employee_punches):
+            if (employee_id, day) in days:
+                punches[(employee_id, day)].append((at, direction))
+
+    existing = {(employee_id, day): (pk, from_punches, is_holiday)
+                for pk, employee_id, day, from_punches, is_holiday in Attendance.objects.filter(
+                    employee_id__in=employee_ids, date__in=dates,
+                ).values_list('pk', 'employee_id', 'date', 'from_punches', 'is_holiday')}
+    records = []
+    for (employee_id, day), day_punches in punches.items():
+        row = existing.get((employee_id, day))
+        if row is not None and not row[1]:
+            continue  # entered by HR
+        check_in, check_out, full_day = fold_punches(day_punches)
+        # punches never mark holidays; keep the flag HR set on the row
+        records.append(Attendance(employee_id=employee_id, date=day, check_in=check_in, check_out=check_out,
+                                  full_day=full_day, is_holiday=row is not None and row[2], from_punches=True))
+    upsert_attendance(records)
+    emptied = [pk for key, (pk, from_punches, _) in existing.items() if from_punches and key not in punches]
+    if emptied:
+        # per-row delete signals mark the payroll dirty and refresh the summaries
+        Attendance.objects.filter(pk__in=emptied).delete()
+    return len(records)
+
+
+def compact_punches(batch_size=None, lag=None):
+    """Fold punch events past the watermark into Attendance, ``batch_size`` events per transaction.
+
+    Each batch rebuilds the days its events fall on and advances the watermark in the same
+    transaction, so an interrupted run resumes where it stopped. Returns
+    ``{'events', 'days', 'batches', 'last_event_id'}``.
+    """
+    batch_size = batch_size or PUNCH_BATCH_SIZE
+    lag = COMPACTION_LAG if lag is None else lag
+    report = {'events': 0, 'days': 0, 'batches': 0, 'last_event_id': None}
+    while True:
+        with transaction.atomic():
+            mark, _ = PunchCompaction.objects.get_or_create(name=WATERMARK)
+            mark = PunchCompaction.objects.select_for_update().get(pk=mark.pk)
+            report['last_event_id'] = mark.last_event_id
+            cutoff = timezone.now() - datetime.timedelta(seconds=lag)
+            fetched = list(PunchEvent.objects.filter(pk__gt=mark.last_event_id).order_by('pk')
+                           .values_list('pk', 'employee_id', 'punched_at', 'received_at')[:batch_size])
+            # stop at the first event that is too fresh, so the watermark never skips one
+            events = []
+            for event in fetched:
+                if event[3] > cutoff:
+                    break
+                events.append(event)
+            if not events:
+                break
+            days = rebuild_attendance_days({(employee_id, timezone.localdate(punched_at))
+                                            for _, employee_id, punched_at, _ in events})
+            mark.last_event_id = events[-1][0]
+            mark.events += len(events)
+            mark.compacted_at = timezone.now()
+            mark.save()
+        report['events'] += len(events)
+        report['days'] += days
+        report['batches'] += 1
+        report['last_event_id'] = mark.last_event_id
+        if len(events) < len(fetched) or len(fetched) < batch_size:
+            break
+    return report
@@ -0,0 +1,127 @@
+# Project/hr/rollups.py
+# Department x payroll period totals (PayrollRollup), so reports read a few rows instead of every payslip.
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+
+from .models import PayrollPeriod, PayrollRollup, Payslip
+from .payroll import _quant
+
+
+def refresh_payroll_rollups(period: PayrollPeriod):
+    """Recompute every department's rollup for ``period`` with one grouped aggregate; returns the row count.
+
+    An archived period whose payslips were pruned keeps its rollups as they are.
+    """
+    if period.archived_at and not Payslip.objects.filter(payroll_period=period).exists():
+        return PayrollRollup.objects.filter(payroll_period=period).count()
+    sums = {name: Sum(name) for name in PayrollRollup.AMOUNT_FIELDS}
+    totals = (Payslip.objects.filter(payroll_period=period).order_by()
+              .values('employee__department_id', 'employee__department__name')
+              .annotate(headcount=Count('pk'), **sums))
+    rollups = [
+        PayrollRollup(
+            payroll_period=period,
+            department_id=row['employee__department_id'],
+            department_name=row['employee__department__name'] or '',
+            headcount=row['headcount'],
+            # SQLite sums decimals as floats
+            **{name: _quant(row[name] or 0) for name in PayrollRollup.AMOUNT_FIELDS},
+        )
+        for row in totals
+    ]
+    PayrollRollup.objects.filter(payroll_period=period).delete()
+    PayrollRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def previous_month(year: int, month: int):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+
+def _change(current, previous):
+    if previous is None:
+        return None
+    fields = ('headcount',) + PayrollRollup.AMOUNT_FIELDS
+    delta = {name: getattr(current, name) - getattr(previous, name) for name in fields}
+    percent = {
+        name: _quant(Decimal(delta[name]) * 100 / getattr(previous, name)) if getattr(previous, name) else None
+        for name in delta
+    }
+    return {'year': previous.payroll_period.year, 'month': previous.payroll_period.month,
+            'delta': delta, 'percent': percent}
+
+
+def rollup_comparisons(rollups):
+    """``{rollup.pk: {'mom': change, 'yoy': change}}`` against the same department's previous
+    month and same month last year (``None`` where there is no such rollup). One query."""
+    rollups = list(rollups)
+    wanted = set()
+    for r in rollups:
+        year, month = r.payroll_period.year, r.payroll_period.month
+        wanted.update([previous_month(year, month), (year - 1, month)])
+    if not wanted:
+        return {}
+    periods = Q()
+    for year, month in wanted:
+        periods |= Q(payroll_period__year=year, payroll_period__month=month)
+    departments = {r.department_id for r in rollups}
+    others = PayrollRollup.objects.filter(periods).select_related('payroll_period')
+    if None in departments:
+        others = others.filter(Q(department_id__in=departments - {None}) | Q(department__isnull=True))
+    else:
+        others = others.filter(department_id__in=departments)
+    index = {(o.payroll_period.year, o.payroll_period.month, o.department_id): o for o in others}
+
+    comparisons = {}
+    for r in rollups:
+        year, month = r.payroll_period.year, r.payroll_period.month
+        comparisons[r.pk] = {
+            'mom': _change(r, index.get((*previous_month(year, month), r.department_id))),
+            'yoy': _change(r, index.get((year - 1, month, r.department_id))),
+        }
+    return comparisons
+
+
+def period_totals(year: int, month=None):
+    """Company-wide totals for each payroll period of ``year`` (or just ``month``), summed from
+    the rollups, each with ``mom`` / ``yoy`` changes like ``rollup_comparisons``."""
+    periods = PayrollPeriod.objects.filter(year=year)
+    if month is not None:
+        periods = periods.filter(month=month)
+    keys = sorted(periods.values_list('year', 'month'))
+    if not keys:
+        return []
+    wanted = set(keys)
+    for y, m in keys:
+        wanted.update([previous_month(y, m), (y - 1, m)])
+    match = Q()
+    for y, m in wanted:
+        match |= Q(payroll_period__year=y, payroll_period__month=m)
+    sums = {name: Sum(name) for name in PayrollRollup.AMOUNT_FIELDS}
+    rows = (PayrollRollup.objects.filter(match).order_by()
+            .values('payroll_period__year', 'payroll_period__month')
+            .annotate(headcount_total=Sum('headcount'), **sums))
+    # unsaved PayrollRollup instances so _change() can compare them like department rows
+    totals = {
+        (row['payroll_period__year'], row['payroll_period__month']): PayrollRollup(
+            payroll_period=PayrollPeriod(year=row['payroll_period__year'], month=row['payroll_period__month']),
+            headcount=row['headcount_total'] or 0,
+            **{name: _quant(row[name] or 0) for name in PayrollRollup.AMOUNT_FIELDS},
+        )
+        for row in rows
+    }
+    result = []
+    for y, m in keys:
+        total = totals.get((y, m))
+        if total is None:
+            continue
+        result.append({
+            'year': y,
+            'month': m,
+            'headcount': total.headcount,
+            **{name: getattr(total, name) for name in PayrollRollup.AMOUNT_FIELDS},
+            'mom': _change(total, totals.get(previous_month(y, m))),
+            'yoy': _change(total, totals.get((y - 1, m))),
+        })
+    return result
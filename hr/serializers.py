@@ -1,8 +1,11 @@
 # Project/hr/serializers.py
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (
-    Department, Employee, Payslip, PayrollPeriod,
-    Attendance, LeaveRequest, OvertimeRecord, Deduction
+    Department, Employee, Payslip, PayrollPeriod, PayrollJob, PayrollRollup,
+    Attendance, LeaveRequest, OvertimeRecord, Deduction, PunchEvent
 )
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -18,12 +21,19 @@ class EmployeeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Employee
-        fields = '__all__'
+        # the login link is set by HR (admin / link_employee_users), never through the API
+        exclude = ('user',)
 
 class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attendance
         fields = '__all__'
+        read_only_fields = ('from_punches',)
+
+    def update(self, instance, validated_data):
+        # an HR edit takes the day over from punch compaction
+        validated_data['from_punches'] = False
+        return super().update(instance, validated_data)
 
 class OvertimeRecordSerializer(serializers.ModelSerializer):
     class Meta:
@@ -71,7 +81,109 @@ class PayrollPeriodSerializer(serializers.ModelSerializer):
 class PayslipSerializer(serializers.ModelSerializer):
     employee = EmployeeSerializer(read_only=True)
     payroll_period = PayrollPeriodSerializer(read_only=True)
+    # derived from the breakdown columns, kept for clients that read the old JSON field
+    details = serializers.JSONField(read_only=True)
 
     class Meta:
         model = Payslip
         fields = '__all__'
+
+class PayslipListSerializer(serializers.ModelSerializer):
+    """Flat payslip row for list views; ``expand`` in the context swaps ids for nested objects."""
+    EXPANDABLE = ('employee', 'payroll_period', 'details')
+
+    employee_code = serializers.CharField(source='employee.employee_code', read_only=True)
+    employee_name = serializers.SerializerMethodField()
+    department_id = serializers.IntegerField(source='employee.department_id', read_only=True)
+    department_name = serializers.CharField(source='employee.department.name', read_only=True, default=None)
+    year = serializers.IntegerField(source='payroll_period.year', read_only=True)
+    month = serializers.IntegerField(source='payroll_period.month', read_only=True)
+
+    class Meta:
+        model = Payslip
+        fields = [
+            'id', 'payroll_period', 'year', 'month',
+            'employee', 'employee_code', 'employee_name', 'department_id', 'department_name',
+            'gross_pay', 'total_deductions', 'net_pay', 'created_at',
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', ())
+        if 'employee' in expand:
+            self.fields['employee'] = EmployeeSerializer(read_only=True)
+        if 'payroll_period' in expand:
+            self.fields['payroll_period'] = PayrollPeriodSerializer(read_only=True)
+        if 'details' in expand:
+            self.fields['details'] = serializers.JSONField(read_only=True)
+
+    def get_employee_name(self, obj):
+        return f"{obj.employee.first_name} {obj.employee.last_name}"
+
+class PayrollJobSerializer(serializers.ModelSerializer):
+    year = serializers.IntegerField(source='payroll_period.year', read_only=True)
+    month = serializers.IntegerField(source='payroll_period.month', read_only=True)
+    percent = serializers.SerializerMethodField()
+    eta_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollJob
+        fields = [
+            'id', 'payroll_period', 'year', 'month', 'status', 'finalize',
+            'processed', 'total', 'percent', 'eta_seconds', 'error',
+            'requested_by', 'created_at', 'started_at', 'finished_at', 'heartbeat_at', 'attempts', 'timings',
+        ]
+        read_only_fields = fields
+
+    def get_percent(self, obj):
+        if not obj.total:
+            return 100.0 if obj.status == PayrollJob.SUCCEEDED else 0.0
+        return round(100.0 * obj.processed / obj.total, 1)
+
+    def get_eta_seconds(self, obj):
+        # linear extrapolation from the progress so far
+        if obj.status != PayrollJob.RUNNING or not obj.started_at or not obj.processed or not obj.total:
+            return None
+        elapsed = (timezone.now() - obj.started_at).total_seconds()
+        return round(elapsed / obj.processed * (obj.total - obj.processed), 1)
+
+def decimal_strings(value):
+    # money in nested plain dicts rendered the way DecimalFields render it (strings, not floats)
+    if isinstance(value, dict):
+        return {key: decimal_strings(item) for key, item in value.items()}
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+class PayrollRollupSerializer(serializers.ModelSerializer):
+    """Department totals for one period; ``mom`` / ``yoy`` come from ``context['comparisons']``."""
+    year = serializers.IntegerField(source='payroll_period.year', read_only=True)
+    month = serializers.IntegerField(source='payroll_period.month', read_only=True)
+    mom = serializers.SerializerMethodField()
+    yoy = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollRollup
+        fields = [
+            'id', 'payroll_period', 'year', 'month', 'department', 'department_name', 'headcount',
+            *PayrollRollup.AMOUNT_FIELDS, 'computed_at', 'mom', 'yoy',
+        ]
+        read_only_fields = fields
+
+    def _comparison(self, obj, key):
+        change = self.context.get('comparisons', {}).get(obj.pk, {}).get(key)
+        return decimal_strings(change) if change else None
+
+    def get_mom(self, obj):
+        return self._comparison(obj, 'mom')
+
+    def get_yoy(self, obj):
+        return self._comparison(obj, 'yoy')
+
+class PunchEventSerializer(serializers.ModelSerializer):
+    employee_code = serializers.CharField(source='employee.employee_code', read_only=True)
+
+    class Meta:
+        model = PunchEvent
+        fields = ['id', 'employee', 'employee_code', 'punched_at', 'direction', 'terminal', 'received_at']
+        read_only_fields = fields
@@ -0,0 +1,100 @@
+# Project/hr/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Attendance, Deduction, Department, Employee, LeaveRequest, OvertimeRecord, PayrollPeriod, Payslip
+from .attendance import refresh_attendance_summaries
+from .tracking import mark_dirty_open_periods, mark_dirty_range
+from . import versions
+
+# date fields that place a record in a payroll month
+_DATED_MODELS = {
+    Attendance: ('date', 'date'),
+    OvertimeRecord: ('date', 'date'),
+    Deduction: ('date', 'date'),
+    LeaveRequest: ('start_date', 'end_date'),
+}
+PAY_FIELDS = ('monthly_basic', 'hra', 'other_allowances', 'pf_percent', 'tax_percent', 'is_active')
+
+
+def _mark_record(employee_id, start, end):
+    if employee_id and start and end:
+        mark_dirty_range(employee_id, start, end)
+
+
+def _remember_previous(sender, instance, **kwargs):
+    # an edit can move a record out of a month (or to another employee): remember where it was
+    instance._hr_previous = None
+    if instance.pk:
+        start_field, end_field = _DATED_MODELS[sender]
+        instance._hr_previous = sender.objects.filter(pk=instance.pk).values(
+            'employee_id', start_field, end_field).first()
+
+
+def _record_saved(sender, instance, **kwargs):
+    start_field, end_field = _DATED_MODELS[sender]
+    previous = getattr(instance, '_hr_previous', None)
+    if previous:
+        _mark_record(previous['employee_id'], previous[start_field], previous[end_field])
+    _mark_record(instance.employee_id, getattr(instance, start_field), getattr(instance, end_field))
+
+
+def _record_deleted(sender, instance, **kwargs):
+    start_field, end_field = _DATED_MODELS[sender]
+    _mark_record(instance.employee_id, getattr(instance, start_field), getattr(instance, end_field))
+
+
+for _model in _DATED_MODELS:
+    pre_save.connect(_remember_previous, sender=_model, dispatch_uid=f'hr_dirty_pre_{_model.__name__}')
+    post_save.connect(_record_saved, sender=_model, dispatch_uid=f'hr_dirty_post_{_model.__name__}')
+    post_delete.connect(_record_deleted, sender=_model, dispatch_uid=f'hr_dirty_del_{_model.__name__}')
+
+
+def _attendance_keys(*records):
+    return {(r['employee_id'], r['date'].year, r['date'].month) for r in records if r and r.get('date')}
+
+
+@receiver(post_save, sender=Attendance, dispatch_uid='hr_summary_post_attendance')
+def _attendance_saved(sender, instance, **kwargs):
+    current = {'employee_id': instance.employee_id, 'date': instance.date}
+    refresh_attendance_summaries(_attendance_keys(current, getattr(instance, '_hr_previous', None)))
+
+
+@receiver(post_delete, sender=Attendance, dispatch_uid='hr_summary_del_attendance')
+def _attendance_deleted(sender, instance, **kwargs):
+    refresh_attendance_summaries(_attendance_keys({'employee_id': instance.employee_id, 'date': instance.date}))
+
+
+@receiver(pre_save, sender=Employee, dispatch_uid='hr_dirty_pre_employee')
+def _employee_pay_fields_before(sender, instance, **kwargs):
+    instance._hr_pay_changed = False
+    if instance.pk:
+        previous = Employee.objects.filter(pk=instance.pk).values(*PAY_FIELDS).first()
+        instance._hr_pay_changed = previous is not None and any(
+            previous[f] != getattr(instance, f) for f in PAY_FIELDS)
+
+
+@receiver(post_save, sender=Employee, dispatch_uid='hr_dirty_post_employee')
+def _employee_pay_fields_after(sender, instance, created, **kwargs):
+    if getattr(instance, '_hr_pay_changed', False):
+        mark_dirty_open_periods(instance.pk)
+
+
+# API resource versions (see hr.versions); the EMPLOYEE version also invalidates hr.profiles. Payslip deletes are not hooked: a post_delete
+# receiver would make every cascade and queryset delete load the rows; bulk paths bump instead.
+_VERSIONED_MODELS = {
+    Department: versions.DEPARTMENT,
+    Employee: versions.EMPLOYEE,
+    PayrollPeriod: versions.PAYROLL_PERIOD,
+    Payslip: versions.PAYSLIP,
+}
+
+
+def _bump_resource(sender, **kwargs):
+    versions.bump_versions(_VERSIONED_MODELS[sender])
+
+
+for _model in _VERSIONED_MODELS:
+    post_save.connect(_bump_resource, sender=_model, dispatch_uid=f'hr_version_post_{_model.__name__}')
+    if _model is not Payslip:
+        post_delete.connect(_bump_resource, sender=_model, dispatch_uid=f'hr_version_del_{_model.__name__}')
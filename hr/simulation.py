@@ -0,0 +1,150 @@
+# Project/hr/simulation.py
+# What-if payroll: recompute a period in memory with overridden pay inputs. Nothing is written.
+from contextlib import contextmanager
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Employee
+from .payroll import fetch_period_inputs, payslip_calculator
+from .profiles import PAY_PROFILE_FIELDS, PayProfile
+
+# database alias simulations read from; point it at a read replica to keep them off the primary
+SIMULATION_DB = getattr(settings, 'HR_SIMULATION_DB', 'default')
+OVERRIDE_FIELDS = ('monthly_basic', 'hra', 'other_allowances', 'pf_percent', 'tax_percent')
+TOTAL_FIELDS = ('gross', 'overtime_pay', 'total_deductions', 'net_pay')
+DEFAULT_OVERTIME_RATE = Decimal('1.5')
+DEFAULT_DAILY_HOURS = Decimal('8')
+
+
+def _decimal(name, value):
+    try:
+        value = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'{name}: {value!r} is not a number')
+    if not value.is_finite() or value < 0:
+        raise ValueError(f'{name}: must be a non-negative number')
+    return value
+
+
+def _clean_fields(label, fields):
+    if not isinstance(fields, dict):
+        raise ValueError(f'{label}: expected an object of field overrides')
+    unknown = set(fields) - set(OVERRIDE_FIELDS)
+    if unknown:
+        raise ValueError(f"{label}: cannot override {', '.join(sorted(unknown))}")
+    return {name: _decimal(f'{label}.{name}', value) for name, value in fields.items()}
+
+
+def _clean_keyed(label, overrides):
+    if overrides is None:
+        return {}
+    if not isinstance(overrides, dict):
+        raise ValueError(f'{label}: expected an object keyed by id')
+    cleaned = {}
+    for key, fields in overrides.items():
+        try:
+            pk = int(key)
+        except (TypeError, ValueError):
+            raise ValueError(f'{label}: {key!r} is not an id')
+        cleaned[pk] = _clean_fields(f'{label}[{pk}]', fields)
+    return cleaned
+
+
+@contextmanager
+def read_snapshot(using):
+    """A read-only transaction, so every query of a simulation sees the same data."""
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        yield
+
+
+def simulate_payroll(year: int, month: int, employees=None, departments=None, all_employees=None,
+                     overtime_rate=None, daily_hours=None, include_unchanged=False, using=None):
+    """Compare a period's payroll as it stands with a what-if scenario.
+
+    ``all_employees``, ``departments`` (``{department_id: fields}``) and ``employees``
+    (``{employee_id: fields}``) override salary fields, applied in that order so the
+    most specific wins; ``overtime_rate`` and ``daily_hours`` replace the run-wide
+    defaults. Reads from ``using`` (default ``HR_SIMULATION_DB``) inside a read-only
+    snapshot and never writes. Returns baseline/simulated/delta totals and a row per
+    employee whose payslip changes (every employee with ``include_unchanged``).
+    """
+    everyone = _clean_fields('all_employees', {} if all_employees is None else all_employees)
+    by_department = _clean_keyed('departments', departments)
+    by_employee = _clean_keyed('employees', employees)
+    sim_rate = DEFAULT_OVERTIME_RATE if overtime_rate is None else _decimal('overtime_rate', overtime_rate)
+    sim_hours = DEFAULT_DAILY_HOURS if daily_hours is None else _decimal('daily_hours', daily_hours)
+    if sim_hours == 0:
+        raise ValueError('daily_hours: must be greater than zero')
+
+    alias = using or SIMULATION_DB
+    with read_snapshot(alias):
+        qs = Employee.objects.using(alias).filter(is_active=True)
+        inputs = fetch_period_inputs(year, month, qs)
+        rows = list(qs.order_by('pk').values_list(*PAY_PROFILE_FIELDS, 'employee_code', 'first_name', 'last_name'))
+
+    width = len(PAY_PROFILE_FIELDS)
+    baseline = [PayProfile(*row[:width]) for row in rows]
+    scenario = [
+        p._replace(**{**everyone, **by_department.get(p.department_id, {}), **by_employee.get(p.id, {})})
+        if everyone or p.department_id in by_department or p.id in by_employee else p
+        for p in baseline
+    ]
+    calculate = payslip_calculator()
+    period_inputs = (inputs['overtime_hours'], inputs['unpaid_days'], inputs['manual_deductions'])
+    before = calculate(baseline, year, month, *period_inputs,
+                       overtime_rate=DEFAULT_OVERTIME_RATE, daily_hours=DEFAULT_DAILY_HOURS)
+    after = calculate(scenario, year, month, *period_inputs, overtime_rate=sim_rate, daily_hours=sim_hours)
+
+    zero = Decimal('0')
+    totals = {key: dict.fromkeys(TOTAL_FIELDS, zero) for key in ('baseline', 'simulated')}
+    changes = []
+    for row, old, new in zip(rows, before, after):
+        for field in TOTAL_FIELDS:
+            totals['baseline'][field] += old[field]
+            totals['simulated'][field] += new[field]
+        delta = {field: new[field] - old[field] for field in TOTAL_FIELDS}
+        if include_unchanged or any(delta.values()):
+            changes.append({
+                'employee_id': row[0],
+                'employee_code': row[width],
+                'name': f'{row[width + 1]} {row[width + 2]}'.strip(),
+                'baseline': {field: old[field] for field in TOTAL_FIELDS},
+                'simulated': {field: new[field] for field in TOTAL_FIELDS},
+                'delta': delta,
+            })
+    totals['delta'] = {field: totals['simulated'][field] - totals['baseline'][field] for field in TOTAL_FIELDS}
+
+    employee_ids = {p.id for p in baseline}
+    department_ids = {p.department_id for p in baseline}
+    return {
+        'year': year,
+        'month': month,
+        'overtime_rate': sim_rate,
+        'daily_hours': sim_hours,
+        'employees': len(rows),
+        'changed': sum(1 for c in changes if any(c['delta'].values())),
+        'totals': totals,
+        'changes': changes,
+        # override keys that matched no active employee / department
+        'unmatched': {
+            'employees': sorted(set(by_employee) - employee_ids),
+            'departments': sorted(set(by_department) - department_ids),
+        },
+    }
+
+
+def simulation_json(value):
+    """``value`` with Decimals as strings, the way payslip details store money."""
+    if isinstance(value, dict):
+        return {key: simulation_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [simulation_json(item) for item in value]
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
@@ -0,0 +1,104 @@
+# Project/hr/synthetic.py
+# Synthetic workforce generator for benchmarks and load testing.
+import datetime
+import random
+from decimal import Decimal
+
+from .models import Attendance, Deduction, Department, Employee, LeaveRequest, OvertimeRecord
+from .payroll import month_bounds
+from .versions import DEPARTMENT, EMPLOYEE, bump_versions
+
+
+def _bulk_create(model, objs, batch_size):
+    created = 0
+    for i in range(0, len(objs), batch_size):
+        model.objects.bulk_create(objs[i:i + batch_size], batch_size=batch_size)
+        created += len(objs[i:i + batch_size])
+    return created
+
+
+def _money(rnd, low, high):
+    return Decimal(rnd.randint(low * 100, high * 100)) / 100
+
+
+def seed_synthetic_workforce(employees, departments=10, year=None, month=None, seed=0, prefix='SYN',
+                             batch_size=5000):
+    """Insert ``employees`` synthetic employees spread over ``departments`` plus a month of activity.
+
+    Every weekday gets an Attendance row (with some absences and half days); a share of
+    employees also get approved overtime, unpaid/paid leave and manual deductions.
+    Everything goes through ``bulk_create`` in ``batch_size`` chunks, so model signals
+    (dirty tracking, attendance summaries) are not triggered. Returns row counts per model.
+    """
+    today = datetime.date.today()
+    year = year or today.year
+    month = month or today.month
+    rnd = random.Random(seed)
+    start, end = month_bounds(year, month)
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days)]
+    weekdays = [d for d in days if d.weekday() < 5]
+    counts = {}
+
+    names = [f'{prefix} Department {i + 1}' for i in range(departments)]
+    existing = dict(Department.objects.filter(name__in=names).values_list('name', 'id'))
+    counts['departments'] = _bulk_create(
+        Department, [Department(name=n, code=f'{prefix[:4]}{i + 1}') for i, n in enumerate(names) if n not in existing],
+        batch_size)
+    department_ids = list(Department.objects.filter(name__in=names).values_list('id', flat=True))
+
+    counts.update(employees=0, attendance=0, overtime=0, leaves=0, deductions=0)
+    offset = Employee.objects.filter(employee_code__startswith=prefix).count()
+    for chunk_start in range(0, employees, batch_size):
+        codes = [f'{prefix}{offset + i:08d}' for i in range(chunk_start, min(chunk_start + batch_size, employees))]
+        staff = [
+            Employee(
+                department_id=rnd.choice(department_ids),
+                first_name=f'Emp{code[len(prefix):]}',
+                last_name=prefix.title(),
+                employee_code=code,
+                email=f'{code.lower()}@example.com',
+                date_of_joining=start - datetime.timedelta(days=rnd.randint(30, 3650)),
+                monthly_basic=_money(rnd, 15000, 150000),
+                hra=_money(rnd, 2000, 40000),
+                other_allowances=_money(rnd, 0, 10000),
+                pf_percent=rnd.choice([Decimal('0'), Decimal('12.00')]),
+                tax_percent=rnd.choice([Decimal('0'), Decimal('5.00'), Decimal('10.00'), Decimal('20.00')]),
+            )
+            for code in codes
+        ]
+        counts['employees'] += _bulk_create(Employee, staff, batch_size)
+        # not every backend returns ids from bulk_create
+        ids = dict(Employee.objects.filter(employee_code__in=codes).values_list('employee_code', 'id'))
+
+        attendance, overtime, leaves, deductions = [], [], [], []
+        for code in codes:
+            employee_id = ids[code]
+            for day in weekdays:
+                roll = rnd.random()
+                if roll < 0.05:
+                    continue  # absent
+                check_in = datetime.time(rnd.randint(8, 10), rnd.randint(0, 59))
+                half = roll < 0.08
+                check_out = datetime.time(min(check_in.hour + (4 if half else 9), 23), rnd.randint(0, 59))
+                attendance.append(Attendance(employee_id=employee_id, date=day, check_in=check_in,
+                                             check_out=check_out, full_day=not half))
+            if rnd.random() < 0.3:
+                for _ in range(rnd.randint(1, 3)):
+                    overtime.append(OvertimeRecord(employee_id=employee_id, date=rnd.choice(weekdays),
+                                                   hours=Decimal(rnd.randint(50, 400)) / 100,
+                                                   approved=rnd.random() < 0.8))
+            if rnd.random() < 0.1:
+                leave_start = rnd.choice(days)
+                length = rnd.randint(1, 5)
+                leaves.append(LeaveRequest(employee_id=employee_id, start_date=leave_start,
+                                           end_date=leave_start + datetime.timedelta(days=length - 1),
+                                           days=length, status=LeaveRequest.APPROVED, unpaid=rnd.random() < 0.5))
+            if rnd.random() < 0.2:
+                deductions.append(Deduction(employee_id=employee_id, name='Synthetic deduction',
+                                            amount=_money(rnd, 100, 5000), date=rnd.choice(days)))
+        counts['attendance'] += _bulk_create(Attendance, attendance, batch_size)
+        counts['overtime'] += _bulk_create(OvertimeRecord, overtime, batch_size)
+        counts['leaves'] += _bulk_create(LeaveRequest, leaves, batch_size)
+        counts['deductions'] += _bulk_create(Deduction, deductions, batch_size)
+    bump_versions(DEPARTMENT, EMPLOYEE)
+    return counts
@@ -1,3 +1,869 @@
-from django.test import TestCase
+import datetime
+import io
+import random
+import tempfile
+import unittest
+import zipfile
+from calendar import monthrange
+from decimal import Decimal, ROUND_HALF_UP
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .identity import link_users_by_email
+from .jobs import PayrollJobConflict, claim_next_job, enqueue_payroll_job, recover_stale_jobs, run_job
+from .models import (Attendance, AttendanceSummary, Deduction, Department, Employee, LeaveRequest, OvertimeRecord,
+                     PayrollJob, PayrollPeriod, Payslip, PunchCompaction, PunchEvent, breakdown_details)
+from .payroll import (_calculate_payslips, bulk_upsert_payslips, compute_payroll, fetch_period_inputs,
+                      PeriodArchived, leave_overlap_days, month_bounds, run_payroll)
+from .parallel import plan_shards
+from .profiles import PayProfile
+from .punches import compact_punches
+from .tracking import dirty_marks
+from . import archive, importers, payroll, pdf, vectorized
+
+
+def _money(rng, high):
+    return Decimal(rng.randint(0, high * 100)).scaleb(-2)
+
+
+@unittest.skipUnless(vectorized.available(), 'numpy is not installed')
+class VectorizedPayslipParityTests(SimpleTestCase):
+    def _random_period(self, rng, count):
+        employees, overtime, unpaid, manual = [], {}, {}, {}
+        for pk in range(1, count + 1):
+            employees.append(PayProfile(
+                id=pk, department_id=None, is_active=True,
+                monthly_basic=_money(rng, 200000), hra=_money(rng, 50000), other_allowances=_money(rng, 20000),
+                pf_percent=rng.choice([Decimal('0'), Decimal('12.00'), _money(rng, 30)]),
+                tax_percent=rng.choice([Decimal('0'), Decimal('10.00'), _money(rng, 40)]),
+            ))
+            if rng.random() < 0.7:
+                overtime[pk] = _money(rng, 80)
+            if rng.random() < 0.3:
+                # whole and half days give exact half-cent ties for some salaries
+                unpaid[pk] = rng.choice([Decimal(rng.randint(1, 10)), Decimal('0.5'), _money(rng, 10)])
+            if rng.random() < 0.4:
+                manual[pk] = _money(rng, 5000)
+        return employees, overtime, unpaid, manual
+
+    def assertParity(self, employees, year, month, *inputs, **rates):
+        expected = _calculate_payslips(employees, year, month, *inputs, **rates)
+        actual = vectorized.calculate_payslips(employees, year, month, *inputs, **rates)
+        for emp, want, got in zip(employees, expected, actual):
+            self.assertEqual(got, want, msg=f'employee {emp.id}')
+            self.assertEqual(str(got['net_pay']), str(want['net_pay']))
+        self.assertEqual(len(actual), len(expected))
+
+    def test_matches_decimal_path_on_random_data(self):
+        rng = random.Random(20240601)
+        for year, month in [(2024, 2), (2025, 1), (2025, 4), (2023, 2)]:
+            employees, *inputs = self._random_period(rng, 2000)
+            self.assertParity(employees, year, month, *inputs)
+
+    def test_matches_with_other_rates(self):
+        rng = random.Random(7)
+        employees, *inputs = self._random_period(rng, 500)
+        for rate, hours in [(Decimal('2'), Decimal('7.5')), (Decimal('1.25'), 9), (1.1, Decimal('8'))]:
+            self.assertParity(employees, 2025, 3, *inputs, overtime_rate=rate, daily_hours=hours)
+
+    def test_rounding_ties_round_half_up(self):
+        # January: 0.31 gross over 0.5 unpaid days is exactly half a cent, as is the
+        # overtime on a 24.80 basic for 0.10 hours at 1.5x over 8-hour days
+        employees = [PayProfile(1, None, True, Decimal('3000.00'), Decimal('100.00'), Decimal('0'),
+                                Decimal('12.50'), Decimal('0')),
+                     PayProfile(2, None, True, Decimal('0.31'), Decimal('0'), Decimal('0'),
+                                Decimal('0'), Decimal('0')),
+                     PayProfile(3, None, True, Decimal('24.80'), Decimal('0'), Decimal('0'),
+                                Decimal('0'), Decimal('0'))]
+        overtime, unpaid = {1: Decimal('2.48'), 3: Decimal('0.10')}, {1: Decimal('0.5'), 2: Decimal('0.5')}
+        self.assertParity(employees, 2025, 1, overtime, unpaid, {})
+        columns = [vectorized.cents_column(values)[0] for values in (
+            [Decimal('0.31'), Decimal('24.80')], [0, 0], [0, 0], [0, 0], [0, 0],
+            [0, Decimal('0.10')], [Decimal('0.5'), 0], [0, 0])]
+        self.assertEqual(vectorized.payslip_columns(2025, 1, *columns)['ties'].tolist(), [True, True])
+
+    def test_large_amounts_use_python_ints(self):
+        big = Decimal('9999999999.99')
+        employees = [PayProfile(1, None, True, big, big, big, Decimal('99.99'), Decimal('99.99'))]
+        self.assertParity(employees, 2025, 1, {1: Decimal('999.99')}, {1: Decimal('31.00')}, {1: big})
+
+
+class LeaveProrationTests(SimpleTestCase):
+    def shares(self, start, end, days, months):
+        return [leave_overlap_days(start, end, Decimal(days), *month_bounds(*ym)) for ym in months]
+
+    def test_leave_inside_month_keeps_recorded_days(self):
+        self.assertEqual(self.shares(datetime.date(2025, 1, 6), datetime.date(2025, 1, 10), '4.5', [(2025, 1), (2025, 2)]),
+                         [Decimal('4.5'), Decimal('0')])
+
+    def test_three_day_leave_over_two_months_adds_up(self):
+        # 31 Jan - 7 Feb on the calendar, 3 working days: rounding each share alone gives 0.38 + 2.63
+        shares = self.shares(datetime.date(2025, 1, 31), datetime.date(2025, 2, 7), '3', [(2025, 1), (2025, 2)])
+        self.assertEqual(shares, [Decimal('0.38'), Decimal('2.62')])
+        self.assertEqual(sum(shares), Decimal('3'))
+        shares = self.shares(datetime.date(2025, 1, 31), datetime.date(2025, 2, 2), '3', [(2025, 1), (2025, 2)])
+        self.assertEqual(shares, [Decimal('1.00'), Decimal('2.00')])
+
+    def test_shares_over_several_months_add_up(self):
+        rng = random.Random(13)
+        for _ in range(500):
+            start = datetime.date(2024, 12, 1) + datetime.timedelta(days=rng.randint(0, 60))
+            end = start + datetime.timedelta(days=rng.randint(1, 80))
+            days = _money(rng, 60)
+            shares = self.shares(start, end, days, [(2024, 12), (2025, 1), (2025, 2), (2025, 3), (2025, 4)])
+            self.assertEqual(sum(shares), days, msg=f'{start}..{end} {days}')
+
+
+def _q(value):
+    return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def _reference_payslip(employee, year, month, overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+    """The payslip worked out the original way, independently of hr.payroll: per-employee
+    queries, Python sums and the Decimal formula, with each leave prorated day by day."""
+    days_in_month = monthrange(year, month)[1]
+    first, last = datetime.date(year, month, 1), datetime.date(year, month, days_in_month)
+    basic, hra, other = Decimal(employee.monthly_basic), Decimal(employee.hra), Decimal(employee.other_allowances)
+    gross = _q(basic + hra + other)
+
+    ots = OvertimeRecord.objects.filter(employee=employee, date__year=year, date__month=month, approved=True)
+    total_ot_hours = sum([o.hours for o in ots]) if ots else Decimal('0')
+    per_hour_rate = (basic / Decimal(days_in_month)) / daily_hours
+    overtime_pay = _q(Decimal(total_ot_hours) * per_hour_rate * Decimal(overtime_rate))
+
+    unpaid_days = Decimal('0')
+    for leave in LeaveRequest.objects.filter(employee=employee, status=LeaveRequest.APPROVED, unpaid=True):
+        span = [leave.start_date + datetime.timedelta(days=n) for n in range((leave.end_date - leave.start_date).days + 1)]
+        before = len([day for day in span if day < first])
+        inside = len([day for day in span if first <= day <= last])
+        if inside:
+            # the running total is rounded, so the shares of a leave add up to its days
+            unpaid_days += _q(leave.days * (before + inside) / len(span)) - _q(leave.days * before / len(span))
+    unpaid_deduction = _q((gross / Decimal(days_in_month)) * unpaid_days)
+
+    manual_deds = Deduction.objects.filter(employee=employee, date__year=year, date__month=month)
+    manual_total = _q(sum([d.amount for d in manual_deds]) if manual_deds else Decimal('0'))
+
+    pf = _q(basic * (Decimal(employee.pf_percent) / Decimal('100'))) if employee.pf_percent else Decimal('0')
+    tax = _q(gross * (Decimal(employee.tax_percent) / Decimal('100'))) if employee.tax_percent else Decimal('0')
+    total_deductions = _q(pf + tax + manual_total + unpaid_deduction)
+    return {
+        'gross': gross,
+        'overtime_pay': overtime_pay,
+        'total_deductions': total_deductions,
+        'net_pay': _q(gross + overtime_pay - total_deductions),
+        'unpaid_days': unpaid_days,
+        'details': {
+            'basic': str(basic),
+            'hra': str(hra),
+            'other_allowances': str(other),
+            'overtime_hours': str(total_ot_hours),
+            'overtime_pay': str(overtime_pay),
+            'pf': str(pf),
+            'tax': str(tax),
+            'manual_deductions': str(manual_total),
+            'unpaid_deduction': str(unpaid_deduction),
+            'days_in_month': days_in_month,
+        },
+    }
+
+
+class PayrollEngineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(20250101)
+        cls.employees = []
+        for n in range(40):
+            cls.employees.append(Employee.objects.create(
+                first_name=f'E{n}', employee_code=f'E{n:03d}', email=f'e{n}@example.com',
+                date_of_joining=datetime.date(2020, 1, 1),
+                monthly_basic=_money(rng, 200000), hra=_money(rng, 50000), other_allowances=_money(rng, 20000),
+                pf_percent=rng.choice([Decimal('0'), Decimal('12.00'), _money(rng, 30)]),
+                tax_percent=rng.choice([Decimal('0'), Decimal('10.00'), _money(rng, 40)]),
+            ))
+        statuses = [LeaveRequest.APPROVED] * 3 + [LeaveRequest.PENDING, LeaveRequest.REJECTED]
+        for emp in cls.employees:
+            for month in (12, 1, 2):
+                year = 2024 if month == 12 else 2025
+                for day in rng.sample(range(1, 29), 3):
+                    OvertimeRecord.objects.create(employee=emp, date=datetime.date(year, month, day),
+                                                  hours=_money(rng, 4), approved=rng.random() < 0.8)
+                for _ in range(rng.choice([0, 0, 1, 2])):
+                    # month ends included: the last and first day are where range filters slip
+                    day = rng.choice([1, monthrange(year, month)[1], rng.randint(2, 27)])
+                    Deduction.objects.create(employee=emp, name='Advance', amount=_money(rng, 5000),
+                                             date=datetime.date(year, month, day))
+            for _ in range(rng.choice([0, 1, 1, 2])):
+                start = datetime.date(2024, 12, 20) + datetime.timedelta(days=rng.randint(0, 60))
+                end = start + datetime.timedelta(days=rng.randint(0, 12))
+                calendar_days = (end - start).days + 1
+                days = rng.choice([Decimal(calendar_days), Decimal(max(calendar_days - 2, 1)), Decimal('0.5')])
+                LeaveRequest.objects.create(employee=emp, start_date=start, end_date=end, days=days,
+                                            status=rng.choice(statuses), unpaid=rng.random() < 0.7)
+        # a leave spanning the month end with more calendar days than leave days
+        LeaveRequest.objects.create(employee=cls.employees[1], start_date=datetime.date(2025, 1, 31),
+                                    end_date=datetime.date(2025, 2, 7), days=Decimal('3'),
+                                    status=LeaveRequest.APPROVED, unpaid=True)
+
+    def assertMatchesReference(self, results, year, month):
+        self.assertEqual(len(results), len(self.employees))
+        for profile, calc in results:
+            employee = Employee.objects.get(pk=profile.id)
+            want = _reference_payslip(employee, year, month)
+            for name in ('gross', 'overtime_pay', 'total_deductions', 'net_pay'):
+                self.assertEqual(str(calc[name]), str(want[name]),
+                                 msg=f'{name} of {employee.employee_code} {year}-{month:02d}')
+            self.assertEqual(calc['details'], want['details'], msg=f'{employee.employee_code} {year}-{month:02d}')
+
+    def test_batch_engine_matches_reference(self):
+        unpaid = spanning = deducted = 0
+        for year, month in [(2024, 12), (2025, 1), (2025, 2)]:
+            self.assertMatchesReference(compute_payroll(year, month), year, month)
+            for employee in self.employees:
+                want = _reference_payslip(employee, year, month)
+                unpaid += want['unpaid_days'] > 0
+                spanning += want['unpaid_days'] != want['unpaid_days'].quantize(Decimal('1'))
+                deducted += want['details']['manual_deductions'] != '0.00'
+        # the data exercises every input, including fractional month shares of a leave
+        self.assertGreater(unpaid, 10)
+        self.assertGreater(spanning, 3)
+        self.assertGreater(deducted, 20)
+
+    @unittest.skipUnless(vectorized.available(), 'numpy is not installed')
+    def test_vectorized_engine_matches_reference(self):
+        with mock.patch.object(payroll, 'USE_VECTORIZED', True):
+            for year, month in [(2025, 1), (2025, 2)]:
+                self.assertMatchesReference(compute_payroll(year, month), year, month)
+
+    def test_stored_payslips_match_reference(self):
+        run_payroll(2025, 1)
+        for payslip in Payslip.objects.select_related('employee'):
+            want = _reference_payslip(payslip.employee, 2025, 1)
+            self.assertEqual((payslip.gross_pay, payslip.total_deductions, payslip.net_pay),
+                             (want['gross'], want['total_deductions'], want['net_pay']))
+            self.assertEqual(payslip.details, want['details'])
+
+    def test_leave_spanning_two_months_is_prorated(self):
+        emp = self.employees[0]
+        LeaveRequest.objects.filter(employee=emp).delete()
+        LeaveRequest.objects.create(employee=emp, start_date=datetime.date(2025, 1, 28),
+                                    end_date=datetime.date(2025, 2, 5), days=Decimal('9'),
+                                    status=LeaveRequest.APPROVED, unpaid=True)
+        only = Employee.objects.filter(pk=emp.pk)
+        self.assertEqual(fetch_period_inputs(2025, 1, only)['unpaid_days'], {emp.pk: Decimal('4.00')})
+        self.assertEqual(fetch_period_inputs(2025, 2, only)['unpaid_days'], {emp.pk: Decimal('5.00')})
+        self.assertEqual(fetch_period_inputs(2025, 3, only)['unpaid_days'], {})
+
+    def test_incremental_run_recomputes_only_dirty_employees(self):
+        first = run_payroll(2025, 1)
+        self.assertEqual((first['created'], first['updated']), (len(self.employees), 0))
+        self.assertFalse(dirty_marks(2025, 1).exists())
+        before = dict(Payslip.objects.values_list('employee_id', 'net_pay'))
+
+        emp = self.employees[3]
+        OvertimeRecord.objects.create(employee=emp, date=datetime.date(2025, 1, 30), hours=Decimal('6'),
+                                      approved=True)
+        self.assertEqual(list(dirty_marks(2025, 1).values_list('employee_id', flat=True)), [emp.pk])
+
+        second = run_payroll(2025, 1, incremental=True)
+        self.assertEqual((second['created'], second['updated']), (0, 1))
+        self.assertEqual([p.employee_id for p in second['payslips']], [emp.pk])
+        self.assertFalse(dirty_marks(2025, 1).exists())
+        after = dict(Payslip.objects.values_list('employee_id', 'net_pay'))
+        self.assertGreater(after.pop(emp.pk), before.pop(emp.pk))
+        self.assertEqual(after, before)
+        self.assertEqual(Payslip.objects.get(employee=emp).net_pay,
+                         _reference_payslip(emp, 2025, 1)['net_pay'])
+
+        third = run_payroll(2025, 1, incremental=True)
+        self.assertEqual((third['created'], third['updated']), (0, 0))
+
+    def test_deactivated_employee_loses_the_open_periods_payslip(self):
+        run_payroll(2025, 1)
+        emp = self.employees[5]
+        emp.is_active = False
+        emp.save()
+        self.assertEqual(list(dirty_marks(2025, 1).values_list('employee_id', flat=True)), [emp.pk])
+
+        result = run_payroll(2025, 1, incremental=True)
+        self.assertEqual((result['created'], result['updated'], result['removed']), (0, 0, 1))
+        self.assertFalse(Payslip.objects.filter(employee=emp).exists())
+        self.assertEqual(Payslip.objects.count(), len(self.employees) - 1)
+        self.assertFalse(dirty_marks(2025, 1).exists())
+
+        emp.is_active = True
+        emp.save()
+        result = run_payroll(2025, 1, incremental=True)
+        self.assertEqual((result['created'], result['updated'], result['removed']), (1, 0, 0))
+
+    def test_bulk_upsert_counts_created_and_updated(self):
+        period = PayrollPeriod.objects.create(year=2025, month=1)
+        calcs = compute_payroll(2025, 1)
+        payslips, created, updated = bulk_upsert_payslips(period, calcs[:25], batch_size=10)
+        self.assertEqual((created, updated), (25, 0))
+        self.assertTrue(all(p.pk is not None for p in payslips))
+
+        payslips, created, updated = bulk_upsert_payslips(period, calcs, batch_size=10)
+        self.assertEqual((created, updated), (len(calcs) - 25, 25))
+        self.assertEqual(Payslip.objects.filter(payroll_period=period).count(), len(calcs))
+        stored = dict(Payslip.objects.values_list('employee_id', 'net_pay'))
+        self.assertEqual(stored, {profile.id: calc['net_pay'] for profile, calc in calcs})
+
+
+class PayProfileEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                date_of_joining=datetime.date(2020, 1, 1), monthly_basic=Decimal('5000.00'))
+        cls.staff = get_user_model().objects.create_user('hr', is_staff=True)
+        cls.user = get_user_model().objects.create_user('someone')
+
+    def test_only_staff_can_read_pay_profiles(self):
+        url = reverse('employee-pay-profiles')
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        self.client.force_login(self.user)
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['monthly_basic'] for p in response.json()], ['5000.00'])
+
+
+class EmployeeUserLinkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user('hr', is_staff=True)
+        cls.alice = User.objects.create_user('alice', email='Alice@Example.com')
+        User.objects.create_user('bob1', email='bob@example.com')
+        User.objects.create_user('bob2', email='BOB@example.com')
+        cls.employee = Employee.objects.create(first_name='Alice', employee_code='A1', email='alice@example.com',
+                                               date_of_joining=datetime.date(2020, 1, 1))
+        Employee.objects.create(first_name='Bob', employee_code='B1', email='bob@example.com',
+                                date_of_joining=datetime.date(2020, 1, 1))
+
+    def test_api_neither_shows_nor_sets_the_link(self):
+        url = reverse('employee-detail', args=[self.employee.pk])
+        self.assertNotIn('user', self.client.get(url).json())
+        self.client.force_login(self.staff)
+        response = self.client.patch(url, {'user': self.alice.pk}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.employee.refresh_from_db()
+        self.assertIsNone(self.employee.user_id)
+
+    def test_link_users_by_email(self):
+        self.assertEqual(link_users_by_email(dry_run=True), [(self.employee.pk, self.alice.pk)])
+        self.assertFalse(Employee.objects.filter(user__isnull=False).exists())
+        # the shared bob address is skipped
+        self.assertEqual(link_users_by_email(), [(self.employee.pk, self.alice.pk)])
+        self.assertEqual(list(Employee.objects.filter(user__isnull=False).values_list('user_id', flat=True)),
+                         [self.alice.pk])
+        self.assertEqual(link_users_by_email(), [])
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user('hr', is_staff=True)
+        cls.department = Department.objects.create(name='Ops')
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('department-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_write_changes_the_etag(self):
+        url = reverse('department-list')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(url, {'name': 'Sales'}).status_code, 201)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_detail_is_looked_up_before_preconditions(self):
+        url = reverse('department-detail', args=[self.department.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        missing = reverse('department-detail', args=[self.department.pk + 100])
+        self.assertEqual(self.client.get(missing, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_other_employees_payslip_is_not_found_even_when_conditional(self):
+        employee = Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                           date_of_joining=datetime.date(2020, 1, 1))
+        period = PayrollPeriod.objects.create(year=2025, month=1)
+        payslip = Payslip.objects.create(payroll_period=period, employee=employee, gross_pay=1,
+                                         total_deductions=0, net_pay=1)
+        self.client.force_login(get_user_model().objects.create_user('someone'))
+        url = reverse('payslip-detail', args=[payslip.pk])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+class PunchCompactionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                               date_of_joining=datetime.date(2020, 1, 1))
+
+    def punch(self, at, direction=''):
+        at = timezone.make_aware(datetime.datetime.strptime(at, '%Y-%m-%d %H:%M'))
+        return PunchEvent.objects.create(employee=self.employee, punched_at=at, direction=direction)
+
+    def attendance(self):
+        return list(Attendance.objects.filter(employee=self.employee).order_by('date')
+                    .values_list('date', 'check_in', 'check_out', 'full_day', 'from_punches'))
+
+    def test_watermark_advances_per_batch_and_rerun_is_a_no_op(self):
+        punches = [self.punch('2025-01-06 09:00', 'in'), self.punch('2025-01-06 12:00', 'out'),
+                   self.punch('2025-01-06 12:30', 'in'), self.punch('2025-01-06 17:30', 'out')]
+        report = compact_punches(batch_size=3, lag=0)
+        self.assertEqual(report, {'events': 4, 'days': 2, 'batches': 2, 'last_event_id': punches[-1].pk})
+        rows = [(datetime.date(2025, 1, 6), datetime.time(9), datetime.time(17, 30), True, True)]
+        self.assertEqual(self.attendance(), rows)
+
+        again = compact_punches(batch_size=3, lag=0)
+        self.assertEqual(again, {'events': 0, 'days': 0, 'batches': 0, 'last_event_id': punches[-1].pk})
+        self.assertEqual(self.attendance(), rows)
+        self.assertEqual(PunchCompaction.objects.get().events, 4)
+
+        late = self.punch('2025-01-06 19:00', 'out')
+        self.assertEqual(compact_punches(lag=0)['events'], 1)
+        self.assertEqual(self.attendance()[0][2], datetime.time(19))
+        self.assertEqual(PunchCompaction.objects.get().last_event_id, late.pk)
+
+    def test_lag_holds_back_fresh_events(self):
+        first = self.punch('2025-01-06 09:00', 'in')
+        fresh = self.punch('2025-01-20 09:00', 'in')
+        stale = self.punch('2025-01-06 17:00', 'out')
+        PunchEvent.objects.filter(pk__in=[first.pk, stale.pk]).update(
+            received_at=timezone.now() - datetime.timedelta(minutes=5))
+        # stops at the first fresh event, so the watermark never moves past it
+        report = compact_punches(lag=60)
+        self.assertEqual((report['events'], report['last_event_id']), (1, first.pk))
+        self.assertEqual(compact_punches(lag=60)['events'], 0)
+        self.assertEqual(PunchCompaction.objects.get().last_event_id, first.pk)
+
+        report = compact_punches(lag=0)
+        self.assertEqual((report['events'], report['last_event_id']), (2, stale.pk))
+        self.assertEqual([row[:3] for row in self.attendance()],
+                         [(datetime.date(2025, 1, 6), datetime.time(9), datetime.time(17)),
+                          (datetime.date(2025, 1, 20), datetime.time(9), None)])
+
+    def test_hr_entered_day_is_not_overwritten(self):
+        Attendance.objects.create(employee=self.employee, date=datetime.date(2025, 1, 6),
+                                  check_in=datetime.time(10, 13), check_out=datetime.time(19, 19), full_day=True)
+        self.punch('2025-01-06 09:00', 'in')
+        self.punch('2025-01-06 12:00', 'out')
+        self.assertEqual(compact_punches(lag=0)['events'], 2)
+        self.assertEqual(self.attendance(),
+                         [(datetime.date(2025, 1, 6), datetime.time(10, 13), datetime.time(19, 19), True, False)])
+
+    def test_night_shift_pairs_across_midnight(self):
+        # the out is compacted first, then the in that opened the shift arrives late
+        self.punch('2025-01-07 06:30', 'out')
+        compact_punches(lag=0)
+        self.assertEqual(self.attendance(), [(datetime.date(2025, 1, 7), None, datetime.time(6, 30), False, True)])
+        self.punch('2025-01-06 22:00', 'in')
+        compact_punches(lag=0)
+        self.assertEqual(self.attendance(),
+                         [(datetime.date(2025, 1, 6), datetime.time(22), datetime.time(6, 30), True, True)])
+        summary = AttendanceSummary.objects.get(employee=self.employee)
+        self.assertEqual((summary.present_days, summary.worked_hours), (1, Decimal('8.50')))
+
+
+class PayrollJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                date_of_joining=datetime.date(2020, 1, 1), monthly_basic=Decimal('3100.00'))
+
+    def test_claim_takes_the_oldest_queued_job(self):
+        first = enqueue_payroll_job(2025, 1)
+        second = enqueue_payroll_job(2025, 2)
+        with self.assertRaises(PayrollJobConflict):
+            enqueue_payroll_job(2025, 1)
+        job = claim_next_job()
+        self.assertEqual((job.pk, job.status, job.attempts), (first.pk, PayrollJob.RUNNING, 1))
+        self.assertIsNotNone(job.heartbeat_at)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_expired_lease_requeues_then_fails(self):
+        job = enqueue_payroll_job(2025, 1)
+        claim_next_job()
+        self.assertEqual(recover_stale_jobs(lease=60, max_attempts=2), (0, 0))
+        expired = timezone.now() - datetime.timedelta(seconds=61)
+        PayrollJob.objects.filter(pk=job.pk).update(heartbeat_at=expired)
+        with self.assertLogs('hr.jobs', 'WARNING'):
+            self.assertEqual(recover_stale_jobs(lease=60, max_attempts=2), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.heartbeat_at), (PayrollJob.QUEUED, None))
+
+        self.assertEqual(claim_next_job().attempts, 2)
+        PayrollJob.objects.filter(pk=job.pk).update(heartbeat_at=expired)
+        with self.assertLogs('hr.jobs', 'WARNING'):
+            self.assertEqual(recover_stale_jobs(lease=60, max_attempts=2), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, PayrollJob.FAILED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_run_job_records_success(self):
+        enqueue_payroll_job(2025, 1)
+        job = run_job(claim_next_job())
+        self.assertEqual((job.status, job.processed, job.total), (PayrollJob.SUCCEEDED, 1, 1))
+        self.assertIn('total_ms', job.timings)
+        self.assertEqual(Payslip.objects.get().net_pay, Decimal('3100.00'))
+
+    def test_run_job_records_failure(self):
+        enqueue_payroll_job(2025, 1)
+        with mock.patch('hr.jobs.run_payroll', side_effect=RuntimeError('disk full')), \
+                self.assertLogs('hr.jobs', 'ERROR'):
+            job = run_job(claim_next_job())
+        self.assertEqual(job.status, PayrollJob.FAILED)
+        self.assertIn('RuntimeError: disk full', job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(Payslip.objects.exists())
+
+    def test_run_job_leaves_a_job_it_lost_alone(self):
+        enqueue_payroll_job(2025, 1)
+        job = claim_next_job()
+        # the lease expired and another worker re-claimed it while this run was going
+        PayrollJob.objects.filter(pk=job.pk).update(attempts=F('attempts') + 1)
+        self.assertEqual(run_job(job).status, PayrollJob.RUNNING)
+
+
+class PayrollArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user('hr', is_staff=True)
+        department = Department.objects.create(name='Ops')
+        cls.employees = [
+            Employee.objects.create(first_name=f'E{n}', last_name='X', employee_code=f'E{n}', email=f'e{n}@example.com',
+                                    department=department if n % 2 else None, date_of_joining=datetime.date(2020, 1, 1),
+                                    monthly_basic=Decimal(1000 + n), tax_percent=Decimal('10.00'))
+            for n in range(5)
+        ]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for name, value in [('ARCHIVE_DIR', Path(tmp.name)), ('ARCHIVE_BLOCK_ROWS', 2)]:
+            patcher = mock.patch.object(archive, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def finalized_period(self):
+        return run_payroll(2025, 1, finalize=True)['period']
+
+    def test_finalizing_does_not_archive_by_default(self):
+        period = self.finalized_period()
+        self.assertIsNone(period.archived_at)
+        self.assertEqual(run_payroll(2025, 1)['updated'], 5)
+
+    def test_archive_roundtrip(self):
+        period = self.finalized_period()
+        live = {p.employee_id: p for p in Payslip.objects.all()}
+        index = archive.archive_period(period, prune=True)
+        self.assertEqual((index['rows'], len(index['blocks'])), (5, 3))
+        self.assertFalse(Payslip.objects.exists())
+        self.assertTrue(archive.verify_archive(period))
+
+        for employee_id, payslip in live.items():
+            row = archive.archived_payslip(period, employee_id)
+            self.assertEqual((row['employee_code'], row['net_pay'], row['tax']),
+                             (payslip.employee.employee_code, str(payslip.net_pay), str(payslip.tax)))
+            self.assertEqual(archive.archived_payslip_data(period, row)['details'], payslip.details)
+        self.assertIsNone(archive.archived_payslip(period, max(live) + 1))
+        with self.assertRaises(PeriodArchived):
+            run_payroll(2025, 1)
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export_payslips_csv', args=[2025, 1]))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(sorted(line.split(',')[0] for line in lines[1:]), ['E0', 'E1', 'E2', 'E3', 'E4'])
+        employee = self.employees[3]
+        response = self.client.get(reverse('payslip-lookup', args=[2025, 1, employee.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['net_pay'], response.json()['archived']),
+                         (str(live[employee.pk].net_pay), True))
+
+    def test_checksum_mismatch_raises(self):
+        period = self.finalized_period()
+        archive.archive_period(period)
+        data_path, _ = archive.archive_paths(2025, 1)
+        data = bytearray(data_path.read_bytes())
+        data[-1] ^= 0xFF
+        data_path.write_bytes(bytes(data))
+        with self.assertRaises(archive.ArchiveError):
+            archive.verify_archive(period)
+        # pruning verifies first, so the rows stay
+        with self.assertRaises(archive.ArchiveError):
+            archive.archive_period(period, prune=True)
+        self.assertEqual(Payslip.objects.count(), 5)
+
+        period.archive_sha256 = '0' * 64
+        with self.assertRaises(archive.ArchiveError):
+            archive.archived_payslip(period, self.employees[0].pk)
+
+    def test_archive_on_finalize_setting(self):
+        with mock.patch.object(archive, 'ARCHIVE_ON_FINALIZE', True):
+            period = self.finalized_period()
+        period.refresh_from_db()
+        self.assertIsNotNone(period.archived_at)
+        self.assertTrue(archive.verify_archive(period))
+
+
+class AttendanceSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                               date_of_joining=datetime.date(2020, 1, 1))
+
+    def test_absences_are_counted_as_of_the_reading_day(self):
+        # January 2025 starts on a Wednesday; rows on Wed 1, Fri 3 and Sat 4
+        for day, full_day in [(1, True), (3, False), (4, True)]:
+            Attendance.objects.create(employee=self.employee, date=datetime.date(2025, 1, day), full_day=full_day,
+                                      check_in=datetime.time(9), check_out=datetime.time(17))
+        summary = AttendanceSummary.objects.get(employee=self.employee, year=2025, month=1)
+        self.assertEqual((summary.present_days, summary.half_days, summary.worked_hours), (2, 1, Decimal('24.00')))
+        self.assertEqual(summary.absences_before(datetime.date(2025, 1, 1)), 0)
+        self.assertEqual(summary.absences_before(datetime.date(2025, 1, 4)), 1)  # Thu 2
+        self.assertEqual(summary.absences_before(datetime.date(2025, 1, 8)), 3)  # + Mon 6, Tue 7
+        self.assertEqual(summary.absences_before(datetime.date(2025, 3, 1)), 23 - 2)
+        with mock.patch('django.utils.timezone.localdate', return_value=datetime.date(2025, 1, 8)):
+            self.assertEqual(summary.absences, 3)
+
+    def test_summary_goes_when_its_last_row_does(self):
+        row = Attendance.objects.create(employee=self.employee, date=datetime.date(2025, 1, 6))
+        self.assertTrue(AttendanceSummary.objects.filter(employee=self.employee).exists())
+        row.delete()
+        self.assertFalse(AttendanceSummary.objects.filter(employee=self.employee).exists())
+
+
+class PayslipBundleTests(TestCase):
+    def test_small_bundle_renders_in_process(self):
+        period = PayrollPeriod.objects.create(year=2025, month=1)
+        for n in range(2):
+            employee = Employee.objects.create(first_name=f'E{n}', employee_code=f'E{n}', email=f'e{n}@example.com',
+                                               date_of_joining=datetime.date(2020, 1, 1))
+            Payslip.objects.create(payroll_period=period, employee=employee, gross_pay=1, total_deductions=0, net_pay=1)
+        self.client.force_login(get_user_model().objects.create_user('hr', is_staff=True))
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with mock.patch('hr.views.HTML', object()), mock.patch.object(pdf, 'PDF_CACHE_DIR', Path(tmp.name)), \
+                mock.patch.object(pdf, 'render_pdf', return_value=b'%PDF-1.7'), \
+                mock.patch.object(pdf, 'render_pool', side_effect=AssertionError('no pool for a small bundle')):
+            response = self.client.get(reverse('payslip_bundle', args=[2025, 1]))
+            content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as bundle:
+            self.assertEqual(bundle.namelist(), ['payslip_E0_2025_01.pdf', 'payslip_E1_2025_01.pdf'])
+
+    def test_render_pool_is_shared(self):
+        pool = pdf.render_pool(2)
+        self.addCleanup(pdf._discard_pool, 2, pool)
+        self.assertIs(pdf.render_pool(2), pool)
+
+
+class ShardPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        departments = [Department.objects.create(name=name) for name in ('A', 'B', 'C')]
+        # department sizes 5, 3 and 2, plus 2 employees without one; E11 is inactive
+        layout = [0, 0, 1, 0, 2, None, 0, 1, 2, 0, 1, None]
+        cls.employees = [
+            Employee.objects.create(first_name=f'E{n}', employee_code=f'E{n}', email=f'e{n}@example.com',
+                                    date_of_joining=datetime.date(2020, 1, 1), is_active=n != 11,
+                                    department=departments[d] if d is not None else None)
+            for n, d in enumerate(layout)
+        ]
+
+    def test_id_range_cuts_contiguous_runs(self):
+        ids = [e.pk for e in self.employees]
+        self.assertEqual(plan_shards(Employee.objects.all(), 3), [ids[0:4], ids[4:8], ids[8:12]])
+        self.assertEqual(plan_shards(Employee.objects.all(), 5), [ids[0:3], ids[3:6], ids[6:9], ids[9:12]])
+        self.assertEqual(plan_shards(Employee.objects.filter(is_active=True), 2), [ids[0:6], ids[6:11]])
+        self.assertEqual(plan_shards(Employee.objects.filter(pk__in=ids[:2]), 8), [[ids[0]], [ids[1]]])
+        self.assertEqual(plan_shards(Employee.objects.none(), 4), [])
+
+    def test_department_packs_whole_departments(self):
+        shards = plan_shards(Employee.objects.all(), 2, 'department')
+        departments = [{Employee.objects.get(pk=pk).department_id for pk in shard} for shard in shards]
+        # 5 -> first, 3 -> second, 2 -> second, the 2 without a department -> first
+        self.assertEqual([len(shard) for shard in shards], [7, 5])
+        self.assertIn(None, departments[0])
+        self.assertFalse(departments[0] & departments[1])
+        self.assertEqual(sorted(pk for shard in shards for pk in shard), [e.pk for e in self.employees])
+        self.assertEqual(len(plan_shards(Employee.objects.all(), 8, 'department')), 4)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            plan_shards(Employee.objects.all(), 2, 'alphabet')
+
+
+class AttendanceImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                               date_of_joining=datetime.date(2020, 1, 1))
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        lines = [
+            '{"employee_code": "A1", "date": "2025-01-06", "check_in": "09:00", "check_out": "17:00"}',
+            '{"employee_code": "", "date": "2025-01-07"}',
+            '{"employee_code": "ZZ", "date": "2025-01-07"}',
+            '{"employee_code": "A1", "date": "07/01/2025", "check_in": "9am", "full_day": "maybe"}',
+            'not json',
+            '[1, 2]',
+            '',
+            '{"employee_code": "A1", "date": "2025-01-08", "full_day": "no", "is_holiday": "0"}',
+        ]
+        report = importers.import_attendance(importers.iter_rows(lines, 'jsonl'))
+        self.assertEqual((report['received'], report['imported'], report['failed']), (7, 2, 5))
+        self.assertFalse(report['errors_truncated'])
+        errors = {e['row']: e['errors'] for e in report['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])
+        self.assertEqual(errors[2], {'employee_code': ['This field is required.']})
+        self.assertEqual(errors[3], {'employee_code': ["Unknown employee_code 'ZZ'."]})
+        self.assertEqual(sorted(errors[4]), ['check_in', 'date', 'full_day'])
+        self.assertIn('non_field_errors', errors[5])
+        self.assertEqual(errors[6], {'non_field_errors': ['Each line must be a JSON object.']})
+        self.assertEqual(list(Attendance.objects.order_by('date').values_list('date', 'full_day')),
+                         [(datetime.date(2025, 1, 6), True), (datetime.date(2025, 1, 8), False)])
+
+    def test_duplicate_rows_upsert_the_same_day(self):
+        Attendance.objects.create(employee=self.employee, date=datetime.date(2025, 1, 6), check_in=datetime.time(8))
+        rows = [
+            {'employee_code': 'A1', 'date': '2025-01-06', 'check_in': '09:00'},
+            {'employee_code': 'A1', 'date': '2025-01-06', 'check_in': '10:00', 'check_out': '14:00', 'full_day': 'no'},
+            {'employee_code': 'A1', 'date': '2025-01-07', 'check_in': '09:00'},
+        ]
+        report = importers.import_attendance(rows)
+        self.assertEqual((report['imported'], report['duplicates'], report['failed']), (2, 1, 0))
+        # across batches the later row updates the one already written
+        report = importers.import_attendance([rows[2], {**rows[2], 'check_in': '07:30'}], batch_size=1)
+        self.assertEqual((report['imported'], report['duplicates']), (2, 0))
+        self.assertEqual(list(Attendance.objects.order_by('date').values_list('date', 'check_in', 'full_day')),
+                         [(datetime.date(2025, 1, 6), datetime.time(10), False),
+                          (datetime.date(2025, 1, 7), datetime.time(7, 30), True)])
+        summary = AttendanceSummary.objects.get(employee=self.employee)
+        self.assertEqual((summary.present_days, summary.half_days, summary.worked_hours), (1, 1, Decimal('4.00')))
+        self.assertTrue(dirty_marks(2025, 1).filter(employee=self.employee).exists())
+
+    def test_error_list_is_capped(self):
+        rows = [{'employee_code': 'nobody', 'date': '2025-01-06'}] * 5
+        with mock.patch.object(importers, 'IMPORT_MAX_ERRORS', 2):
+            report = importers.import_attendance(rows)
+        self.assertEqual((report['failed'], len(report['errors']), report['errors_truncated']), (5, 2, True))
+        self.assertEqual([e['row'] for e in report['errors']], [1, 2])
+
+    def test_bulk_endpoint(self):
+        self.client.force_login(get_user_model().objects.create_user('hr', is_staff=True))
+        url = reverse('attendance-bulk')
+        body = 'employee_code,date,check_in,check_out\nA1,2025-01-06,09:00,17:00\nB2,2025-01-06,,\n'
+        response = self.client.post(url, body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['imported'], response.json()['failed']), (1, 1))
+        response = self.client.post(url, 'employee_code,date\nB2,2025-01-06\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(url, 'x', content_type='text/plain').status_code, 415)
+
+
+class PayslipBreakdownTests(TestCase):
+    def test_details_round_trip_through_the_columns(self):
+        employee = Employee.objects.create(first_name='A', employee_code='A1', email='a@example.com',
+                                           date_of_joining=datetime.date(2020, 1, 1), monthly_basic=Decimal('3000'),
+                                           hra=Decimal('500.50'), pf_percent=Decimal('12.00'))
+        employee.refresh_from_db()  # the stored, two-place amounts the payroll runs read
+        period = PayrollPeriod.objects.create(year=2025, month=2)
+        cases = [
+            # no overtime and no tax: the old JSON said '0' for those
+            payroll.calculate_payslip(employee, 2025, 2),
+            payroll.calculate_payslip(employee, 2025, 2, total_ot_hours=Decimal('2.50'), unpaid_days=Decimal('1.5'),
+                                      manual_total=Decimal('99.90')),
+        ]
+        self.assertEqual((cases[0]['details']['overtime_hours'], cases[0]['details']['tax']), ('0', '0'))
+        self.assertEqual(cases[0]['details']['manual_deductions'], '0.00')
+        for calc in cases:
+            Payslip.objects.filter(payroll_period=period).delete()
+            bulk_upsert_payslips(period, [(employee, calc)])
+            self.assertEqual(Payslip.objects.get(payroll_period=period).details, calc['details'])
+
+    def test_breakdown_details_formatting(self):
+        values = [Decimal('1.00'), Decimal('0.00'), Decimal('0.00'), Decimal('0.00'), Decimal('0.00'),
+                  Decimal('0.00'), Decimal('12.30'), Decimal('0.00'), Decimal('0.00'), 28]
+        self.assertEqual(breakdown_details(values), {
+            'basic': '1.00', 'hra': '0.00', 'other_allowances': '0.00', 'overtime_hours': '0',
+            'overtime_pay': '0.00', 'pf': '0', 'tax': '12.30', 'manual_deductions': '0.00',
+            'unpaid_deduction': '0.00', 'days_in_month': 28,
+        })
+
+
+class BreakdownBackfillMigrationTests(TransactionTestCase):
+    before = [('hr', '0005_payrolljob')]
+    after = [('hr', '0006_payslip_breakdown_columns')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_backfill_reproduces_the_old_details(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        old = executor.loader.project_state(self.before).apps
+        employee = old.get_model('hr', 'Employee').objects.create(
+            first_name='A', employee_code='A1', email='a@example.com', date_of_joining=datetime.date(2020, 1, 1))
+        period = old.get_model('hr', 'PayrollPeriod').objects.create(year=2025, month=2)
+        profile = PayProfile(employee.pk, None, True, Decimal('3000.00'), Decimal('500.50'), Decimal('0.00'),
+                             Decimal('12.00'), Decimal('0.00'))
+        calcs = [payroll.calculate_payslip(profile, 2025, 2),
+                 payroll.calculate_payslip(profile, 2025, 3, total_ot_hours=Decimal('2.50'),
+                                           unpaid_days=Decimal('1.5'), manual_total=Decimal('99.90'))]
+        Payslip0005 = old.get_model('hr', 'Payslip')
+        for n, calc in enumerate(calcs):
+            if n:
+                period = old.get_model('hr', 'PayrollPeriod').objects.create(year=2025, month=3)
+            Payslip0005.objects.create(payroll_period=period, employee=employee, gross_pay=calc['gross'],
+                                       total_deductions=calc['total_deductions'], net_pay=calc['net_pay'],
+                                       details=calc['details'])
+
+        executor.loader.build_graph()
+        executor.migrate(self.after)
+        new = executor.loader.project_state(self.after).apps
+        rows = new.get_model('hr', 'Payslip').objects.order_by('pk').values_list(*Payslip.BREAKDOWN_FIELDS)
+        self.assertEqual([breakdown_details(row) for row in rows], [calc['details'] for calc in calcs])
+
+        executor.loader.build_graph()
+        executor.migrate(self.before)
+        old = executor.loader.project_state(self.before).apps
+        self.assertEqual([p.details for p in old.get_model('hr', 'Payslip').objects.order_by('pk')],
+                         [calc['details'] for calc in calcs])
+
+
+class PayrollSimulationRequestTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', is_staff=True))
+        self.url = reverse('payroll_simulation')
+
+    def test_body_must_be_an_object(self):
+        for body in ('[2025, 2]', '"x"', '3'):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'detail': 'Send a JSON object with year and month.'})
+
+    def test_missing_year_is_reported(self):
+        response = self.client.post(self.url, {'month': 2}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'detail': 'year is required'})
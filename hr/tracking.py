@@ -0,0 +1,58 @@
+# Project/hr/tracking.py
+# Dirty-employee bookkeeping for incremental payroll runs.
+from django.db import connections
+from django.utils import timezone
+
+from .models import PayrollDirtyEmployee, PayrollPeriod
+
+
+def months_between(start, end):
+    """Yield every (year, month) touched by the inclusive date range start..end."""
+    if end < start:
+        start, end = end, start
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+
+def mark_dirty(keys):
+    """Record (employee_id, year, month) keys as needing recomputation."""
+    keys = {k for k in keys if k[0] is not None}
+    if not keys:
+        return
+    marks = [PayrollDirtyEmployee(employee_id=e, year=y, month=m) for e, y, m in keys]
+    features = connections[PayrollDirtyEmployee.objects.db].features
+    if features.supports_update_conflicts_with_target:
+        # refresh marked_at on existing rows so a run that started earlier does not clear them
+        PayrollDirtyEmployee.objects.bulk_create(
+            marks, update_conflicts=True, unique_fields=['employee', 'year', 'month'], update_fields=['marked_at'])
+    else:
+        PayrollDirtyEmployee.objects.bulk_create(marks, ignore_conflicts=True)
+        PayrollDirtyEmployee.objects.filter(
+            employee_id__in={e for e, _, _ in keys}, year__in={y for _, y, _ in keys}, month__in={m for _, _, m in keys},
+        ).update(marked_at=timezone.now())
+
+
+def mark_dirty_range(employee_id, start, end):
+    mark_dirty((employee_id, y, m) for y, m in months_between(start, end))
+
+
+def mark_dirty_open_periods(employee_id):
+    """Mark every period that can still be regenerated (not finalized) for one employee."""
+    periods = PayrollPeriod.objects.filter(finalized=False).values_list('year', 'month')
+    mark_dirty((employee_id, y, m) for y, m in periods)
+
+
+def dirty_marks(year, month):
+    return PayrollDirtyEmployee.objects.filter(year=year, month=month)
+
+
+def clear_dirty(year, month, before, employee_ids=None):
+    """Drop marks for a period that were set before ``before`` (the start of the run that consumed them)."""
+    qs = dirty_marks(year, month).filter(marked_at__lte=before)
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    qs.delete()
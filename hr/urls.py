@@ -2,9 +2,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    DepartmentViewSet, EmployeeViewSet, PayslipViewSet,
-    AttendanceViewSet, LeaveRequestViewSet, OvertimeRecordViewSet, DeductionViewSet,
-    export_payslips_csv, export_payslips_xlsx, payslip_pdf
+    DepartmentViewSet, EmployeeViewSet, PayslipViewSet, PayrollJobViewSet, PayrollRollupViewSet,
+    AttendanceViewSet, PunchEventViewSet, LeaveRequestViewSet, OvertimeRecordViewSet, DeductionViewSet,
+    export_payslips_csv, export_payslips_xlsx, payslip_pdf, payslip_bundle, payroll_simulation, metrics
 )
 
 router = DefaultRouter()
@@ -12,13 +12,19 @@ router.register(r'departments', DepartmentViewSet, basename='department')
 router.register(r'employees', EmployeeViewSet, basename='employee')
 router.register(r'payslips', PayslipViewSet, basename='payslip')
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
+router.register(r'punches', PunchEventViewSet, basename='punchevent')
 router.register(r'leaves', LeaveRequestViewSet, basename='leaverequest')
 router.register(r'overtime', OvertimeRecordViewSet, basename='overtime')
 router.register(r'deductions', DeductionViewSet, basename='deduction')
+router.register(r'payroll-jobs', PayrollJobViewSet, basename='payrolljob')
+router.register(r'payroll-rollups', PayrollRollupViewSet, basename='payrollrollup')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('export/<int:year>/<int:month>/', export_payslips_csv, name='export_payslips_csv'),
     path('export/xlsx/<int:year>/<int:month>/', export_payslips_xlsx, name='export_payslips_xlsx'),
     path('payslip/<int:payslip_id>/pdf/', payslip_pdf, name='payslip_pdf'),
+    path('payslip/bundle/<int:year>/<int:month>/', payslip_bundle, name='payslip_bundle'),
+    path('payroll/simulate/', payroll_simulation, name='payroll_simulation'),
+    path('metrics/', metrics, name='hr_metrics'),
 ]
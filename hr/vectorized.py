@@ -0,0 +1,164 @@
+# Project/hr/vectorized.py
+# Columnar payslip arithmetic in integer cents (numpy is optional).
+from calendar import monthrange
+from decimal import Decimal
+from fractions import Fraction
+from operator import attrgetter
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from .payroll import calculate_payslip
+
+# products that stay under this fit in int64; larger inputs switch to Python ints (object arrays)
+_INT64_SAFE = 2 ** 62
+# payslip_columns() argument order
+INPUT_COLUMNS = ('monthly_basic', 'hra', 'other_allowances', 'pf_percent', 'tax_percent',
+                 'overtime_hours', 'unpaid_days', 'manual_deductions')
+
+
+def available():
+    return np is not None
+
+
+def cents_column(values):
+    """``values`` as whole hundredths in an int array, plus a mask of entries that are
+    not a whole number of hundredths (or are negative) and so cannot be computed here."""
+    scaled = [Decimal(v).scaleb(2) for v in values]
+    cents = [int(x) for x in scaled]
+    unusable = np.array([x != c or c < 0 for x, c in zip(scaled, cents)], dtype=bool)
+    try:
+        return np.array(cents, dtype=np.int64), unusable
+    except OverflowError:
+        return np.array(cents, dtype=object), unusable
+
+
+def _money(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def _round_half_up(num, den, exact_ties_only):
+    """``num / den`` rounded half up (``num >= 0``, ``den > 0``) and a mask of rows where
+    the Decimal path's 28-digit intermediates may round the other way.
+
+    A quotient that is not a tie is at least ``1/den`` from a half-cent boundary, far
+    beyond Decimal's rounding error unless ``num`` is astronomically large.
+    """
+    q, r = num // den, num % den
+    gap = 2 * r - den
+    rounded = q + (gap >= 0)
+    if exact_ties_only:
+        return rounded, gap == 0
+    return rounded, np.abs(gap) * 10 ** 26 <= 2 * num
+
+
+def payslip_columns(year: int, month: int, basic, hra, other_allowances, pf_percent, tax_percent,
+                    overtime_hours, unpaid_days, manual_deductions,
+                    overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+    """The ``calculate_payslip`` formula over whole columns.
+
+    Every input is an array of non-negative whole hundredths (cents, hundredths of an
+    hour/day/percent). Returns ``{name: array of cents}`` for gross, overtime_pay, pf,
+    tax, unpaid_deduction, total_deductions and net_pay, plus a boolean ``ties`` array
+    marking rows whose rounding must be taken from the Decimal path instead.
+    """
+    days_in_month = monthrange(year, month)[1]
+    rate, hours = Fraction(Decimal(overtime_rate)), Fraction(Decimal(daily_hours))
+    if hours <= 0 or rate < 0:
+        raise ValueError('daily_hours must be positive and overtime_rate non-negative')
+    # overtime cents = T/100 * (B/100) / dim / hours * rate * 100 = T * B * k / ot_den
+    k = rate.numerator * hours.denominator
+    ot_den = 100 * days_in_month * hours.numerator * rate.denominator
+
+    columns = [basic, hra, other_allowances, pf_percent, tax_percent, overtime_hours, unpaid_days, manual_deductions]
+    top = [int(c.max()) if len(c) else 0 for c in columns]
+    gross_top = top[0] + top[1] + top[2]
+    exact_ties_only = max(top[5] * top[0] * k, gross_top * top[6], top[0] * top[3], gross_top * top[4],
+                          gross_top + top[7] + ot_den) * 2 < _INT64_SAFE
+    dtype = np.int64 if exact_ties_only else object
+    basic, hra, other, pf_pct, tax_pct, ot, unpaid_days, manual = (c.astype(dtype) for c in columns)
+
+    gross = basic + hra + other
+    overtime_pay, ot_ties = _round_half_up(ot * basic * k, ot_den, exact_ties_only)
+    unpaid, unpaid_ties = _round_half_up(gross * unpaid_days, 100 * days_in_month, exact_ties_only)
+    # basic * pf_percent / 100 is exact in Decimal, so its ties round the same way
+    pf, _ = _round_half_up(basic * pf_pct, 10000, True)
+    tax, _ = _round_half_up(gross * tax_pct, 10000, True)
+    total_deductions = pf + tax + manual + unpaid
+    return {
+        'gross': gross,
+        'overtime_pay': overtime_pay,
+        'pf': pf,
+        'tax': tax,
+        'unpaid_deduction': unpaid,
+        'total_deductions': total_deductions,
+        'net_pay': gross + overtime_pay - total_deductions,
+        'ties': np.asarray(ot_ties | unpaid_ties, dtype=bool),
+    }
+
+
+def calculate_payslips(employees, year: int, month: int, overtime_hours, unpaid_days, manual_deductions,
+                       overtime_rate=Decimal('1.5'), daily_hours=Decimal('8')):
+    """``calculate_payslip`` for a list of employees, computed with ``payslip_columns``.
+
+    ``overtime_hours``, ``unpaid_days`` and ``manual_deductions`` are ``{employee_id: Decimal}``
+    maps as returned by ``fetch_period_inputs``. Returns calcs in ``employees`` order, equal
+    to the Decimal path to the cent; rows ``payslip_columns`` cannot settle exactly are
+    handed to ``calculate_payslip``.
+    """
+    if not employees:
+        return []
+    zero = Decimal('0')
+    ids = [emp.pk for emp in employees]
+    inputs = [[values.get(pk, zero) for pk in ids] for values in (overtime_hours, unpaid_days, manual_deductions)]
+
+    def decimal_path(i):
+        return calculate_payslip(employees[i], year, month, total_ot_hours=inputs[0][i], unpaid_days=inputs[1][i],
+                                 manual_total=inputs[2][i], overtime_rate=overtime_rate, daily_hours=daily_hours)
+
+    if Fraction(Decimal(daily_hours)) <= 0 or Fraction(Decimal(overtime_rate)) < 0:
+        return [decimal_path(i) for i in range(len(employees))]
+
+    columns, unusable = [], np.zeros(len(employees), dtype=bool)
+    for values in [list(map(attrgetter(name), employees)) for name in INPUT_COLUMNS[:5]] + inputs:
+        cents, bad = cents_column(values)
+        columns.append(cents)
+        unusable |= bad
+    columns = [np.where(unusable, 0, cents) for cents in columns]
+    out = payslip_columns(year, month, *columns, overtime_rate=overtime_rate, daily_hours=daily_hours)
+
+    fallback = set(np.flatnonzero(unusable | out['ties']).tolist())
+    days_in_month = monthrange(year, month)[1]
+    # back to Python ints once; indexing numpy arrays element by element is slow
+    rows = zip(out['gross'].tolist(), out['overtime_pay'].tolist(), out['total_deductions'].tolist(),
+               out['net_pay'].tolist(), out['pf'].tolist(), out['tax'].tolist(), columns[7].tolist(),
+               out['unpaid_deduction'].tolist())
+    results = []
+    for i, (emp, row) in enumerate(zip(employees, rows)):
+        if i in fallback:
+            results.append(decimal_path(i))
+            continue
+        gross, overtime_pay, total_deductions, net_pay, pf, tax, manual, unpaid = row
+        overtime_pay = _money(overtime_pay)
+        results.append({
+            'gross': _money(gross),
+            'overtime_pay': overtime_pay,
+            'total_deductions': _money(total_deductions),
+            'net_pay': _money(net_pay),
+            'details': {
+                'basic': str(Decimal(emp.monthly_basic)),
+                'hra': str(Decimal(emp.hra)),
+                'other_allowances': str(Decimal(emp.other_allowances)),
+                'overtime_hours': str(inputs[0][i]),
+                'overtime_pay': str(overtime_pay),
+                # calculate_payslip leaves an unset percentage as a bare Decimal('0')
+                'pf': str(_money(pf)) if emp.pf_percent else '0',
+                'tax': str(_money(tax)) if emp.tax_percent else '0',
+                'manual_deductions': str(_money(manual)),
+                'unpaid_deduction': str(_money(unpaid)),
+                'days_in_month': days_in_month,
+            },
+        })
+    return results
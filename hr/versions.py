@@ -0,0 +1,41 @@
+# Project/hr/versions.py
+# Per-resource change counters (ResourceVersion) for conditional GETs and the API response cache.
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ResourceVersion
+
+EMPLOYEE = 'employee'
+DEPARTMENT = 'department'
+PAYROLL_PERIOD = 'payroll_period'
+PAYSLIP = 'payslip'
+
+
+def _bump(names):
+    now = timezone.now()
+    counters = ResourceVersion.objects.filter(name__in=names)
+    if counters.update(version=F('version') + 1, updated_at=now) < len(names):
+        # first write to a resource: create its row and bump again (counters only need to move forward)
+        ResourceVersion.objects.bulk_create([ResourceVersion(name=name) for name in names], ignore_conflicts=True)
+        counters.update(version=F('version') + 1, updated_at=now)
+
+
+def bump_versions(*names):
+    """Record a write to each resource in ``names`` once the current transaction commits.
+
+    Model signals call this for single saves and deletes; code that bypasses
+    signals (``bulk_create``, ``QuerySet.update`` / ``delete``) must call it itself.
+    """
+    names = sorted(set(names))
+    if names:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def get_versions(names):
+    """``{name: (version, updated_at)}``; resources never written to are ``(0, None)``."""
+    found = dict.fromkeys(names, (0, None))
+    for name, version, updated_at in ResourceVersion.objects.filter(name__in=names).values_list(
+            'name', 'version', 'updated_at'):
+        found[name] = (version, updated_at)
+    return found
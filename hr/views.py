@@ -1,10 +1,17 @@
 # Project/hr/views.py
+import codecs
 import csv
 import json
+import tempfile
+import time
+from decimal import Decimal
 
 from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
-from django.http import HttpResponse
+from django.urls import reverse
+from django.db.models import Count, F, Sum
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
@@ -13,7 +20,7 @@ from rest_framework.response import Response
 # Models
 from .models import (
     Department, Employee, Attendance, LeaveRequest, OvertimeRecord,
-    Deduction, Payslip, PayrollPeriod
+    Deduction, Payslip, PayrollPeriod, PayrollJob, PayrollRollup, PunchEvent, breakdown_details
 )
 
 # Serializers
@@ -21,15 +28,26 @@ from .serializers import (
     DepartmentSerializer, EmployeeSerializer,
     AttendanceSerializer, LeaveRequestSerializer,
     OvertimeRecordSerializer, DeductionSerializer,
-    PayslipSerializer, PayrollPeriodSerializer
+    PayslipSerializer, PayslipListSerializer, PayrollPeriodSerializer, PayrollJobSerializer,
+    PayrollRollupSerializer, PunchEventSerializer, decimal_strings
 )
+from .pagination import HRCursorPagination
+
+from .importers import import_attendance, iter_rows
+from .punches import import_punches
+from .metrics import payroll_job_metrics, registry
+from .profiles import get_pay_profiles
+from .rollups import period_totals, rollup_comparisons
+from .simulation import simulate_payroll, simulation_json
 
 # Payroll logic
-from .payroll import generate_payroll_for_period
-try:
-    from weasyprint import HTML
-except Exception:
-    HTML = None
+from .conditional import ConditionalGetMixin
+from .identity import current_employee_id
+from .jobs import PayrollJobConflict, enqueue_payroll_job
+from .payroll import PeriodArchived
+from . import archive, versions
+from . import pdf
+from .pdf import HTML
 
 import openpyxl
 
@@ -45,40 +63,87 @@ class IsOwnerOrHR(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user and request.user.is_staff:
             return True
-        try:
-            if hasattr(obj, 'employee'):
-                return obj.employee.email == request.user.email
-            if isinstance(obj, Employee):
-                return obj.email == request.user.email
-        except Exception:
-            pass
-        return False
+        employee_id = current_employee_id(request)
+        if employee_id is None:
+            return False
+        if isinstance(obj, Employee):
+            return obj.pk == employee_id
+        return getattr(obj, 'employee_id', None) == employee_id
 
 
 # Core ViewSets
-class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
+class EmployeeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Employee.objects.all().select_related('department')
     serializer_class = EmployeeSerializer
     permission_classes = [IsHROrReadOnly]
-
-class DepartmentViewSet(viewsets.ModelViewSet):
+    pagination_class = HRCursorPagination
+    version_resources = (versions.EMPLOYEE, versions.DEPARTMENT)
+
+    @action(detail=False, methods=['get'], url_path='pay-profiles', permission_classes=[permissions.IsAdminUser])
+    def pay_profiles(self, request):
+        # every employee's salary fields, unpaginated: HR only. Served from the pay-profile
+        # cache, no Employee instances are built (list/retrieve stay on the ORM)
+        profiles = get_pay_profiles().values()
+        department = request.query_params.get('department')
+        if department is not None and department.isdigit():
+            profiles = [p for p in profiles if p.department_id == int(department)]
+        if request.query_params.get('active') in ('1', 'true'):
+            profiles = [p for p in profiles if p.is_active]
+        data = [
+            {field: (str(value) if isinstance(value, Decimal) else value) for field, value in p._asdict().items()}
+            for p in sorted(profiles, key=lambda p: p.id)
+        ]
+        return Response(data)
+
+
+class DepartmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [IsHROrReadOnly]  # reuse existing permission class (read for all, write for staff)
+    pagination_class = HRCursorPagination
+    version_resources = (versions.DEPARTMENT,)
 
 
-class PayslipViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Payslip.objects.all().select_related('employee', 'payroll_period')
+class PayslipViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Payslip.objects.all().select_related('employee__department', 'payroll_period')
     serializer_class = PayslipSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = HRCursorPagination
+    version_resources = (versions.PAYSLIP, versions.EMPLOYEE, versions.DEPARTMENT, versions.PAYROLL_PERIOD)
+
+    def get_expand(self):
+        # ?expand=employee,payroll_period,details opts list rows into nested objects
+        raw = self.request.query_params.get('expand', '')
+        return {name for name in raw.split(',') if name in PayslipListSerializer.EXPANDABLE}
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return PayslipListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['expand'] = self.get_expand()
+        return context
 
     def get_queryset(self):
         user = self.request.user
         qs = super().get_queryset()
+        if self.action == 'list':
+            if 'details' not in self.get_expand():
+                qs = qs.defer(*Payslip.BREAKDOWN_FIELDS)
+            # ?year=&month= narrows the list to one payroll period
+            params = self.request.query_params
+            if params.get('year', '').isdigit():
+                qs = qs.filter(payroll_period__year=int(params['year']))
+            if params.get('month', '').isdigit():
+                qs = qs.filter(payroll_period__month=int(params['month']))
         if user.is_authenticated and user.is_staff:
             return qs
-        if user.is_authenticated:
-            return qs.filter(employee__email=user.email)
+        employee_id = current_employee_id(self.request)
+        if employee_id is not None:
+            return qs.filter(employee_id=employee_id)
         return qs.none()
 
     @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
@@ -90,37 +155,201 @@ class PayslipViewSet(viewsets.ReadOnlyModelViewSet):
             return Response({'detail': 'year and month are required integer values.'}, status=status.HTTP_400_BAD_REQUEST)
 
         finalize = bool(request.data.get('finalize', False))
-        payslips = generate_payroll_for_period(year, month, finalize=finalize)
-        serializer = PayslipSerializer(payslips, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        try:
+            job = enqueue_payroll_job(year, month, finalize=finalize, user=request.user)
+        except PayrollJobConflict as exc:
+            return Response({'detail': str(exc), 'job': PayrollJobSerializer(exc.job).data},
+                            status=status.HTTP_409_CONFLICT)
+        except PeriodArchived as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_409_CONFLICT)
+        # the payroll_worker command picks the job up; poll the status URL for progress
+        status_url = request.build_absolute_uri(reverse('payrolljob-detail', args=[job.pk]))
+        return Response({'job': PayrollJobSerializer(job).data, 'status_url': status_url},
+                        status=status.HTTP_202_ACCEPTED, headers={'Location': status_url})
+
+    @action(detail=False, methods=['get'],
+            url_path=r'period/(?P<year>[0-9]{4})/(?P<month>[0-9]{1,2})/employee/(?P<employee_id>[0-9]+)')
+    def lookup(self, request, year, month, employee_id):
+        # one employee's payslip for a period; archived periods are read from the archive file
+        period = get_object_or_404(PayrollPeriod, year=int(year), month=int(month))
+        employee_id = int(employee_id)
+        if not period.archived_at:
+            payslip = get_object_or_404(self.get_queryset(), payroll_period=period, employee_id=employee_id)
+            return Response(PayslipListSerializer(payslip, context={'expand': {'details'}}).data)
+        user = request.user
+        if not user.is_staff and current_employee_id(request) != employee_id:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            row = archive.archived_payslip(period, employee_id)
+        except archive.ArchiveError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if row is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(archive.archived_payslip_data(period, row))
+
+
+class PayrollJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PayrollJob.objects.all().select_related('payroll_period')
+    serializer_class = PayrollJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = HRCursorPagination
+
+
+class PayrollRollupViewSet(viewsets.ReadOnlyModelViewSet):
+    # department x period totals with month-over-month / year-over-year changes (see hr.rollups)
+    queryset = PayrollRollup.objects.all().select_related('payroll_period')
+    serializer_class = PayrollRollupSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = HRCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        params = self.request.query_params
+        if params.get('year', '').isdigit():
+            qs = qs.filter(payroll_period__year=int(params['year']))
+        if params.get('month', '').isdigit():
+            qs = qs.filter(payroll_period__month=int(params['month']))
+        if params.get('department', '').isdigit():
+            qs = qs.filter(department_id=int(params['department']))
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        # one extra query per page for all the comparison rows
+        if args:
+            rows = args[0] if kwargs.get('many') else [args[0]]
+            kwargs.setdefault('context', self.get_serializer_context())['comparisons'] = rollup_comparisons(rows)
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        # company-wide totals per period of ?year= (and optional ?month=)
+        year = request.query_params.get('year', '')
+        month = request.query_params.get('month', '')
+        if not year.isdigit():
+            return Response({'detail': 'year is required'}, status=status.HTTP_400_BAD_REQUEST)
+        totals = period_totals(int(year), int(month) if month.isdigit() else None)
+        return Response([decimal_strings(t) for t in totals])
 
 
 # Attendance / Leave / Overtime / Deduction ViewSets
+def _bulk_rows(request):
+    # text/csv or application/x-ndjson bodies are streamed; a JSON array is also accepted.
+    # Returns None for any other content type.
+    content_type = (request.content_type or '').split(';')[0].strip()
+    lines = codecs.iterdecode(request.stream or [], 'utf-8')
+    if content_type == 'text/csv':
+        return iter_rows(lines, 'csv')
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        return iter_rows(lines, 'jsonl')
+    if content_type == 'application/json' and isinstance(request.data, list):
+        return (row if isinstance(row, dict) else {'_error': 'Each item must be a JSON object.'}
+                for row in request.data)
+    return None
+
+
+def _bulk_response(report):
+    if report['failed'] and not report['imported']:
+        return Response(report, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report, status=status.HTTP_200_OK)
+
+
+_UNSUPPORTED_BULK = {'detail': 'Send text/csv, application/x-ndjson or a JSON array of rows.'}
+
+
 class AttendanceViewSet(viewsets.ModelViewSet):
     queryset = Attendance.objects.all().select_related('employee')
     serializer_class = AttendanceSerializer
     permission_classes = [IsHROrReadOnly]
+    pagination_class = HRCursorPagination
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        rows = _bulk_rows(request)
+        if rows is None:
+            return Response(_UNSUPPORTED_BULK, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        return _bulk_response(import_attendance(rows))
+
+
+class PunchEventViewSet(viewsets.ReadOnlyModelViewSet):
+    # raw terminal punches; the compact_punches command folds them into Attendance
+    queryset = PunchEvent.objects.all().select_related('employee')
+    serializer_class = PunchEventSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = HRCursorPagination
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        employee = self.request.query_params.get('employee', '')
+        if employee.isdigit():
+            qs = qs.filter(employee_id=int(employee))
+        return qs
+
+    @action(detail=False, methods=['post'])
+    def ingest(self, request):
+        # insert-only: punches never read-modify-write Attendance, so terminals do not contend
+        rows = _bulk_rows(request)
+        if rows is None:
+            return Response(_UNSUPPORTED_BULK, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        return _bulk_response(import_punches(rows))
 
 
 class LeaveRequestViewSet(viewsets.ModelViewSet):
     queryset = LeaveRequest.objects.all().select_related('employee')
     serializer_class = LeaveRequestSerializer
     permission_classes = [IsHROrReadOnly]
+    pagination_class = HRCursorPagination
 
 
 class OvertimeRecordViewSet(viewsets.ModelViewSet):
     queryset = OvertimeRecord.objects.all().select_related('employee')
     serializer_class = OvertimeRecordSerializer
     permission_classes = [IsHROrReadOnly]
+    pagination_class = HRCursorPagination
 
 
 class DeductionViewSet(viewsets.ModelViewSet):
     queryset = Deduction.objects.all().select_related('employee')
     serializer_class = DeductionSerializer
     permission_classes = [IsHROrReadOnly]
+    pagination_class = HRCursorPagination
 
 
 # Export endpoints (CSV, XLSX, PDF)
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    # csv.writer target that hands each formatted row straight back to the caller
+    def write(self, value):
+        return value
+
+
+def _export_rows(period, columns):
+    """``values_list(*columns)`` tuples for the period's payslips, read from the archive file
+    once the period is archived (its rows may have been pruned from the table)."""
+    if period.archived_at:
+        archive.read_index(period)  # fail before the response starts streaming
+        names = [column.replace('employee__', '') for column in columns]
+        return (tuple(row[name] for name in names) for row in archive.iter_archived_payslips(period))
+    payslips = Payslip.objects.filter(payroll_period=period).order_by('pk').values_list(*columns)
+    return payslips.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _payslip_csv_rows(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['Employee Code', 'Employee Name', 'Gross Pay', 'Total Deductions', 'Net Pay', 'Details'])
+    for row in rows:
+        code, first_name, last_name, gross, deductions, net = row[:6]
+        yield writer.writerow([
+            code,
+            f"{first_name} {last_name}",
+            str(gross),
+            str(deductions),
+            str(net),
+            json.dumps(breakdown_details(row[6:])),
+        ])
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def export_payslips_csv(request, year, month):
@@ -128,26 +357,27 @@ def export_payslips_csv(request, year, month):
     if not period:
         return HttpResponse("No payroll data found for this period.", status=404)
 
-    payslips = Payslip.objects.filter(payroll_period=period).select_related('employee')
+    try:
+        rows = _export_rows(period, [
+            'employee__employee_code', 'employee__first_name', 'employee__last_name',
+            'gross_pay', 'total_deductions', 'net_pay', *Payslip.BREAKDOWN_FIELDS,
+        ])
+    except archive.ArchiveError as exc:
+        return HttpResponse(str(exc), status=503)
 
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(_payslip_csv_rows(rows), content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="payslips_{year}_{month}.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['Employee Code', 'Employee Name', 'Gross Pay', 'Total Deductions', 'Net Pay', 'Details'])
-
-    for p in payslips:
-        writer.writerow([
-            p.employee.employee_code,
-            f"{p.employee.first_name} {p.employee.last_name}",
-            str(p.gross_pay),
-            str(p.total_deductions),
-            str(p.net_pay),
-            json.dumps(p.details),
-        ])
     return response
 
 
+DETAIL_COLUMNS = list(Payslip.BREAKDOWN_FIELDS)
+XLSX_EXTRA_SHEETS = ('departments', 'details')
+
+
+def _xlsx_number(value):
+    return float(value) if value not in (None, '') else None
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def export_payslips_xlsx(request, year, month):
@@ -155,38 +385,151 @@ def export_payslips_xlsx(request, year, month):
     if not period:
         return HttpResponse("No payroll data found for this period.", status=404)
 
-    payslips = Payslip.objects.filter(payroll_period=period).select_related('employee')
+    # ?sheets=departments,details adds the optional summary / breakdown sheets
+    sheets = {name for name in request.GET.get('sheets', '').split(',') if name in XLSX_EXTRA_SHEETS}
+    payslips = Payslip.objects.filter(payroll_period=period)
 
-    wb = openpyxl.Workbook()
-    ws = wb.active
+    # write-only workbooks stream rows to disk instead of keeping every cell in memory
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Payslips')
     ws.append(['Employee Code', 'Employee Name', 'Gross Pay', 'Total Deductions', 'Net Pay'])
-
-    for p in payslips:
+    details_ws = None
+    if 'details' in sheets:
+        details_ws = wb.create_sheet('Details')
+        details_ws.append(['Employee Code'] + DETAIL_COLUMNS)
+
+    columns = ['employee__employee_code', 'employee__first_name', 'employee__last_name',
+               'gross_pay', 'total_deductions', 'net_pay']
+    if details_ws is not None:
+        columns.extend(DETAIL_COLUMNS)
+    try:
+        rows = _export_rows(period, columns)
+    except archive.ArchiveError as exc:
+        return HttpResponse(str(exc), status=503)
+    for row in rows:
+        code, first_name, last_name, gross, deductions, net = row[:6]
         ws.append([
-            p.employee.employee_code,
-            f"{p.employee.first_name} {p.employee.last_name}",
-            float(p.gross_pay),
-            float(p.total_deductions),
-            float(p.net_pay),
+            code,
+            f"{first_name} {last_name}",
+            float(gross),
+            float(deductions),
+            float(net),
         ])
-
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        if details_ws is not None:
+            details_ws.append([code] + [_xlsx_number(value) for value in row[6:]])
+
+    if 'departments' in sheets:
+        dept_ws = wb.create_sheet('Departments')
+        dept_ws.append(['Department', 'Headcount', 'Gross Pay', 'Total Deductions', 'Net Pay',
+                        'Overtime Pay', 'PF', 'Tax', 'Unpaid Leave'])
+        if period.archived_at:
+            # pruned periods have no payslip rows left; their rollups were kept
+            totals = (PayrollRollup.objects.filter(payroll_period=period).order_by('department_name')
+                      .values('department_name', 'headcount', 'pf', 'tax', gross=F('gross_pay'),
+                              deductions=F('total_deductions'), net=F('net_pay'),
+                              overtime=F('overtime_pay'), unpaid=F('unpaid_deduction')))
+        else:
+            totals = (payslips.order_by('employee__department__name')
+                      .values(department_name=F('employee__department__name'))
+                      .annotate(headcount=Count('pk'), gross=Sum('gross_pay'),
+                                deductions=Sum('total_deductions'), net=Sum('net_pay'),
+                                overtime=Sum('overtime_pay'), pf=Sum('pf'), tax=Sum('tax'),
+                                unpaid=Sum('unpaid_deduction')))
+        for t in totals:
+            dept_ws.append([
+                t['department_name'] or 'Unassigned',
+                t['headcount'],
+                _xlsx_number(t['gross']),
+                _xlsx_number(t['deductions']),
+                _xlsx_number(t['net']),
+                _xlsx_number(t['overtime']),
+                _xlsx_number(t['pf']),
+                _xlsx_number(t['tax']),
+                _xlsx_number(t['unpaid']),
+            ])
+
+    # spool to a temp file; FileResponse streams it and closes (deletes) it afterwards
+    spool = tempfile.TemporaryFile()
+    wb.save(spool)
+    spool.seek(0)
+    return FileResponse(
+        spool,
+        as_attachment=True,
+        filename=f'payslips_{year}_{month}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
-    response['Content-Disposition'] = f'attachment; filename=payslips_{year}_{month}.xlsx'
-    wb.save(response)
-    return response
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
 def payslip_pdf(request, payslip_id):
-    p = get_object_or_404(Payslip, pk=payslip_id)
+    p = get_object_or_404(Payslip.objects.select_related('employee', 'payroll_period'), pk=payslip_id)
     if HTML is None:
         return HttpResponse("WeasyPrint not available. Install weasyprint and its system deps.", status=500)
 
-    html_string = render_to_string('hr/payslip_template.html', {'p': p})
-    pdf = HTML(string=html_string).write_pdf()
-    response = HttpResponse(pdf, content_type='application/pdf')
+    # the cache key is a content hash of the payslip, so it doubles as a strong ETag
+    key = pdf.payslip_cache_key(p)
+    etag = f'"{key}"'
+    last_modified = pdf.cached_pdf_mtime(key)
+    last_modified = int(last_modified) if last_modified is not None else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    content = pdf.payslip_pdf_bytes(p, key=key)
+    response = HttpResponse(content, content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="payslip_{p.employee.employee_code}_{p.payroll_period}.pdf"'
+    response['ETag'] = etag
+    # the cache write is best effort and eviction may already have removed the file
+    response['Last-Modified'] = http_date(last_modified or pdf.cached_pdf_mtime(key) or time.time())
     return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def payslip_bundle(request, year, month):
+    period = PayrollPeriod.objects.filter(year=year, month=month).first()
+    if not period:
+        return HttpResponse("No payroll data found for this period.", status=404)
+    if HTML is None:
+        return HttpResponse("WeasyPrint not available. Install weasyprint and its system deps.", status=500)
+
+    payslips = (Payslip.objects.filter(payroll_period=period)
+                .select_related('employee', 'payroll_period').order_by('pk'))
+    # small periods render in this process; larger ones go to the process-wide render pool
+    workers = 1 if payslips.count() < pdf.PDF_POOL_MIN_PAYSLIPS else None
+    entries = pdf.iter_payslip_pdfs(payslips.iterator(chunk_size=500), workers=workers)
+    response = StreamingHttpResponse(pdf.stream_zip(entries), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="payslips_{year}_{month}.zip"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def payroll_simulation(request):
+    # what-if run: computed in memory from HR_SIMULATION_DB, nothing is saved
+    data = request.data
+    if not isinstance(data, dict):
+        return Response({'detail': 'Send a JSON object with year and month.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result = simulate_payroll(
+            int(data['year']), int(data['month']),
+            employees=data.get('employees'),
+            departments=data.get('departments'),
+            all_employees=data.get('all_employees'),
+            overtime_rate=data.get('overtime_rate'),
+            daily_hours=data.get('daily_hours'),
+            include_unchanged=bool(data.get('include_unchanged')),
+        )
+    except KeyError as exc:
+        return Response({'detail': f'{exc.args[0]} is required'}, status=status.HTTP_400_BAD_REQUEST)
+    except (TypeError, ValueError) as exc:
+        return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(simulation_json(result))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def metrics(request):
+    # rolling histograms of this process, plus payroll job timings recorded by the workers
+    return Response({**registry.snapshot(), **payroll_job_metrics()})